@@ -1,5 +1,5 @@
 from cl.graph import Node as Node
-from algorithms.sorters import merge_sort, quick_sort, radix_sort
+from algorithms.sorters import merge_sort, radix_sort
 
 
 class RedBlackNode:
@@ -128,6 +128,123 @@ class RedBlackTree:
         left_child.right = node
         node.parent = left_child
 
+    def delete(self, key):
+        """
+        Delete a key from the Red-Black Tree.
+        Args:
+        - key: The key to delete (e.g., flight_number).
+        Returns:
+        - True if the key was found and deleted, False otherwise.
+        """
+        node = self._find(key)
+        if node == self.TNULL:
+            return False
+
+        removed = node
+        removed_color = removed.color
+        if node.left == self.TNULL:
+            child = node.right
+            self._transplant(node, node.right)
+        elif node.right == self.TNULL:
+            child = node.left
+            self._transplant(node, node.left)
+        else:
+            removed = self._minimum(node.right)
+            removed_color = removed.color
+            child = removed.right
+            if removed.parent == node:
+                child.parent = removed
+            else:
+                self._transplant(removed, removed.right)
+                removed.right = node.right
+                removed.right.parent = removed
+            self._transplant(node, removed)
+            removed.left = node.left
+            removed.left.parent = removed
+            removed.color = node.color
+
+        if removed_color == "black":
+            self._fix_delete(child)
+        return True
+
+    def _fix_delete(self, node):
+        """
+        Fix the Red-Black Tree after deletion to maintain balance.
+        """
+        while node != self.root and node.color == "black":
+            if node == node.parent.left:
+                sibling = node.parent.right
+                if sibling.color == "red":
+                    sibling.color = "black"
+                    node.parent.color = "red"
+                    self._left_rotate(node.parent)
+                    sibling = node.parent.right
+                if sibling.left.color == "black" and sibling.right.color == "black":
+                    sibling.color = "red"
+                    node = node.parent
+                else:
+                    if sibling.right.color == "black":
+                        sibling.left.color = "black"
+                        sibling.color = "red"
+                        self._right_rotate(sibling)
+                        sibling = node.parent.right
+                    sibling.color = node.parent.color
+                    node.parent.color = "black"
+                    sibling.right.color = "black"
+                    self._left_rotate(node.parent)
+                    node = self.root
+            else:
+                sibling = node.parent.left
+                if sibling.color == "red":
+                    sibling.color = "black"
+                    node.parent.color = "red"
+                    self._right_rotate(node.parent)
+                    sibling = node.parent.left
+                if sibling.right.color == "black" and sibling.left.color == "black":
+                    sibling.color = "red"
+                    node = node.parent
+                else:
+                    if sibling.left.color == "black":
+                        sibling.right.color = "black"
+                        sibling.color = "red"
+                        self._left_rotate(sibling)
+                        sibling = node.parent.left
+                    sibling.color = node.parent.color
+                    node.parent.color = "black"
+                    sibling.left.color = "black"
+                    self._right_rotate(node.parent)
+                    node = self.root
+        node.color = "black"
+
+    def _transplant(self, node, replacement):
+        """
+        Replace the subtree rooted at node with the one rooted at replacement.
+        """
+        if node.parent is None:
+            self.root = replacement
+        elif node == node.parent.left:
+            node.parent.left = replacement
+        else:
+            node.parent.right = replacement
+        replacement.parent = node.parent
+
+    def _minimum(self, node):
+        """
+        Return the node with the smallest key in the subtree rooted at node.
+        """
+        while node.left != self.TNULL:
+            node = node.left
+        return node
+
+    def _find(self, key):
+        """
+        Return the node holding key, or TNULL if the key is not in the tree.
+        """
+        current = self.root
+        while current != self.TNULL and key != current.key:
+            current = current.left if key < current.key else current.right
+        return current
+
     def search(self, key):
         """
         Search for a key in the Red-Black Tree.
@@ -182,6 +299,13 @@ class FlightRedBlackTree:
         key = flight[0] 
         self.tree.insert(key, flight)
 
+    def delete(self, flight_number):
+        """
+        Remove a flight from the Red-Black Tree.
+        Returns True if the flight was found.
+        """
+        return self.tree.delete(flight_number)
+
     def search_by_flight_number(self, flight_number):
         """
         Search for a flight by flight number.
@@ -233,7 +357,7 @@ class FlightRedBlackTree:
         elif sort_by == "Arrival Airport":
             return merge_sort(flights, key=lambda x: x[2])  # Use Merge Sort
         elif sort_by == "Available Seats":
-            return quick_sort(flights, key=lambda x: x[4])  # Use Quick Sort
+            return merge_sort(flights, key=lambda x: x[4])  # Use Merge Sort, keeping ties in flight order
         return flights
     
 
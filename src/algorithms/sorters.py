@@ -1,108 +1,333 @@
+from bisect import bisect_left, bisect_right
+
+# Runs shorter than this are sorted by insertion before merging
+MIN_MERGE_RUN = 64
+# Consecutive wins of one run after which merging switches to galloping (binary search)
+MIN_GALLOP = 7
+
+
 # Merge sort algorithm for sorting objects based on a given key function
 def merge_sort(objects, key):
     """
     Merge sort algorithm for sorting objects based on a given key function.
+    Sorts bottom-up: runs of MIN_MERGE_RUN objects are insertion sorted, then merged pairwise
+    with doubling widths, alternating between the list and one preallocated buffer.
+    Keys are computed once per object. The sort is stable.
     Args:
-    - objects: List of objects to sort.
+    - objects: List of objects to sort. It is sorted in place and returned.
     - key: A function that extracts the sorting key from each object.
     """
-    if len(objects) > 1:
-        mid = len(objects) // 2
-        left_half = objects[:mid]
-        right_half = objects[mid:]
-
-        # Recursively split the lists
-        merge_sort(left_half, key)
-        merge_sort(right_half, key)
-
-        # Merge process
-        i = j = k = 0
-        while i < len(left_half) and j < len(right_half):
-            if key(left_half[i]) < key(right_half[j]):
-                objects[k] = left_half[i]
-                i += 1
-            else:
-                objects[k] = right_half[j]
-                j += 1
-            k += 1
+    n = len(objects)
+    if n < 2:
+        return objects
+    keys = [key(obj) for obj in objects]
+    values = objects
+    for start in range(0, n, MIN_MERGE_RUN):
+        _insertion_sort_run(keys, values, start, min(start + MIN_MERGE_RUN, n))
 
-        while i < len(left_half):
-            objects[k] = left_half[i]
-            i += 1
-            k += 1
+    key_buffer, value_buffer = [None] * n, [None] * n
+    width = MIN_MERGE_RUN
+    while width < n:
+        for low in range(0, n, 2 * width):
+            _merge_runs(keys, values, key_buffer, value_buffer, low, min(low + width, n), min(low + 2 * width, n))
+        keys, key_buffer = key_buffer, keys
+        values, value_buffer = value_buffer, values
+        width *= 2
+
+    if values is not objects:
+        objects[:] = values
+    return objects
+
+
+def _insertion_sort_run(keys, values, start, end):
+    """
+    Stable binary insertion sort of keys[start:end], moving values along with their keys.
+    """
+    for i in range(start + 1, end):
+        current = keys[i]
+        position = bisect_right(keys, current, start, i)
+        if position < i:
+            value = values[i]
+            keys[position + 1:i + 1] = keys[position:i]
+            values[position + 1:i + 1] = values[position:i]
+            keys[position] = current
+            values[position] = value
 
-        while j < len(right_half):
-            objects[k] = right_half[j]
+
+def _merge_runs(keys, values, key_buffer, value_buffer, low, mid, high):
+    """
+    Merge the sorted runs [low, mid) and [mid, high) of keys and values into the buffers.
+    Ties take the left run first, which keeps the sort stable. Once one run wins MIN_GALLOP
+    times in a row, the rest of its winning streak is found by binary search and copied at once.
+    """
+    if mid >= high or not keys[mid] < keys[mid - 1]:
+        # A single run, or two runs already in order
+        key_buffer[low:high] = keys[low:high]
+        value_buffer[low:high] = values[low:high]
+        return
+
+    i, j, k = low, mid, low
+    left_key, right_key = keys[i], keys[j]
+    streak = 0  # Consecutive wins of the right run (positive) or of the left run (negative)
+    while True:
+        if right_key < left_key:
+            key_buffer[k] = right_key
+            value_buffer[k] = values[j]
             j += 1
             k += 1
+            if j == high:
+                break
+            streak = streak + 1 if streak > 0 else 1
+            if streak >= MIN_GALLOP:
+                # Right keys smaller than the left head can all go at once
+                end = bisect_left(keys, left_key, j, high)
+                key_buffer[k:k + end - j] = keys[j:end]
+                value_buffer[k:k + end - j] = values[j:end]
+                k += end - j
+                j = end
+                streak = 0
+                if j == high:
+                    break
+            right_key = keys[j]
+        else:
+            key_buffer[k] = left_key
+            value_buffer[k] = values[i]
+            i += 1
+            k += 1
+            if i == mid:
+                break
+            streak = streak - 1 if streak < 0 else -1
+            if streak <= -MIN_GALLOP:
+                # Left keys not greater than the right head can all go at once
+                end = bisect_right(keys, right_key, i, mid)
+                key_buffer[k:k + end - i] = keys[i:end]
+                value_buffer[k:k + end - i] = values[i:end]
+                k += end - i
+                i = end
+                streak = 0
+                if i == mid:
+                    break
+            left_key = keys[i]
+
+    # Copy what is left of either run
+    key_buffer[k:k + mid - i] = keys[i:mid]
+    value_buffer[k:k + mid - i] = values[i:mid]
+    k += mid - i
+    key_buffer[k:k + high - j] = keys[j:high]
+    value_buffer[k:k + high - j] = values[j:high]
 
-    return objects
+
+# Ranges up to this size are finished by insertion sort
+INSERTION_SORT_SIZE = 16
+# Ranges from this size on take their pivot from nine keys instead of three
+NINTHER_SIZE = 128
 
 
 # Quick sort algorithm for sorting objects based on a given key function
 def quick_sort(arr, key=lambda x: x):
     """
     Quick sort algorithm for sorting objects based on a given key function.
+    Introspective and in place: keys are computed once, pivots are the median of three keys,
+    and each range is partitioned three ways, so runs of equal keys (e.g., seat classes) are
+    settled in one pass. Small ranges are insertion sorted, and ranges that partition badly too
+    often are heapsorted, so the sort is O(n log n) with O(log n) recursion depth.
+    Unlike merge_sort, objects with equal keys may change order.
     Args:
-    - arr: List of objects to sort.
+    - arr: List of objects to sort. It is sorted in place and returned.
     - key: A function that extracts the sorting key from each object.
     """
-    if len(arr) <= 1:
+    n = len(arr)
+    if n < 2:
         return arr
-    pivot = arr[len(arr) // 2]
-    left = [x for x in arr if key(x) < key(pivot)]
-    middle = [x for x in arr if key(x) == key(pivot)]
-    right = [x for x in arr if key(x) > key(pivot)]
-    return quick_sort(left, key) + middle + quick_sort(right, key)
+    keys = [key(x) for x in arr]
+    _introsort(keys, arr, 0, n, 2 * n.bit_length())
+    return arr
 
 
-# Radix sort algorithm for sorting objects based on a string attribute
-def radix_sort(objects, get_attribute):
+def _introsort(keys, values, low, high, depth_limit):
     """
-    Radix sort algorithm for sorting objects based on a string attribute.
-    Args:
-    - objects: List of objects to sort.
-    - get_attribute: A function that extracts the attribute to sort by.
+    Sort keys[low:high], moving values along with their keys.
+    Recursion only goes into the smaller side of each partition; the larger side is handled by
+    the loop, which bounds the recursion depth by log2(n).
     """
-    if not objects:
-        return objects
+    while high - low > INSERTION_SORT_SIZE:
+        if depth_limit == 0:
+            _heap_sort(keys, values, low, high)
+            return
+        depth_limit -= 1
+        pivot = _choose_pivot(keys, low, high)
+        less, greater = _partition_three_way(keys, values, low, high, pivot)
+        if less - low < high - greater:
+            _introsort(keys, values, low, less, depth_limit)
+            low = greater
+        else:
+            _introsort(keys, values, greater, high, depth_limit)
+            high = less
+    _insertion_sort_run(keys, values, low, high)
+
+
+def _choose_pivot(keys, low, high):
+    """
+    Return the median of the first, middle and last keys of keys[low:high]. Large ranges use the
+    median of three such medians (Tukey's ninther), which resists inputs like organ pipes.
+    """
+    last, mid = high - 1, (low + high) // 2
+    if high - low < NINTHER_SIZE:
+        return _median_of_three(keys[low], keys[mid], keys[last])
+    step = (high - low) // 8
+    return _median_of_three(
+        _median_of_three(keys[low], keys[low + step], keys[low + 2 * step]),
+        _median_of_three(keys[mid - step], keys[mid], keys[mid + step]),
+        _median_of_three(keys[last - 2 * step], keys[last - step], keys[last])
+    )
 
-    # Find the maximum length string
-    max_len = max(len(get_attribute(obj)) for obj in objects)
 
-    # Do counting sort for every character position
-    for pos in range(max_len - 1, -1, -1):
-        objects = counting_sort(objects, get_attribute, pos)
+def _median_of_three(a, b, c):
+    if a < b:
+        if b < c:
+            return b
+        return c if a < c else a
+    if a < c:
+        return a
+    return c if b < c else b
 
-    return objects
+
+def _partition_three_way(keys, values, low, high, pivot):
+    """
+    Partition keys[low:high] into keys below, equal to and above pivot (Bentley-McIlroy).
+    Both ends are scanned towards each other, so input that is already in order needs no swaps.
+    Keys equal to pivot are parked at the ends during the scan and swapped into the middle after it.
+
+    Returns:
+    - (less, greater): keys[low:less] < pivot, keys[less:greater] == pivot, keys[greater:high] > pivot.
+    """
+    i, j = low, high - 1
+    p, q = low, high - 1  # keys[low:p] and keys[q + 1:high] are equal to pivot
+    while True:
+        while i <= j and not pivot < keys[i]:
+            if not keys[i] < pivot:
+                keys[p], keys[i] = keys[i], keys[p]
+                values[p], values[i] = values[i], values[p]
+                p += 1
+            i += 1
+        while i <= j and not keys[j] < pivot:
+            if not pivot < keys[j]:
+                keys[q], keys[j] = keys[j], keys[q]
+                values[q], values[j] = values[j], values[q]
+                q -= 1
+            j -= 1
+        if i > j:
+            break
+        keys[i], keys[j] = keys[j], keys[i]
+        values[i], values[j] = values[j], values[i]
+        i += 1
+        j -= 1
+
+    # Swap the parked keys next to the pivot position: [low, p) before [i - 1] and [q + 1, high) from [i]
+    for offset in range(min(p - low, i - p)):
+        left, right = low + offset, i - 1 - offset
+        keys[left], keys[right] = keys[right], keys[left]
+        values[left], values[right] = values[right], values[left]
+    for offset in range(min(high - 1 - q, q + 1 - i)):
+        left, right = i + offset, high - 1 - offset
+        keys[left], keys[right] = keys[right], keys[left]
+        values[left], values[right] = values[right], values[left]
+    return low + (i - p), high - (q + 1 - i)
+
+
+def _heap_sort(keys, values, low, high):
+    """
+    Heapsort keys[low:high], moving values along with their keys.
+    """
+    size = high - low
+    for root in range(size // 2 - 1, -1, -1):
+        _sift_down(keys, values, low, root, size)
+    for end in range(size - 1, 0, -1):
+        keys[low], keys[low + end] = keys[low + end], keys[low]
+        values[low], values[low + end] = values[low + end], values[low]
+        _sift_down(keys, values, low, 0, end)
 
 
-# Counting sort algorithm for sorting objects based on a character position
-def counting_sort(objects, get_attribute, position):
+def _sift_down(keys, values, offset, root, size):
     """
-    Counting sort algorithm for sorting objects based on a character position.
+    Restore the max-heap property below root, for the heap stored at keys[offset:offset + size].
+    """
+    while True:
+        child = 2 * root + 1
+        if child >= size:
+            return
+        if child + 1 < size and keys[offset + child] < keys[offset + child + 1]:
+            child += 1
+        if not keys[offset + root] < keys[offset + child]:
+            return
+        parent, child = offset + root, offset + child
+        keys[parent], keys[child] = keys[child], keys[parent]
+        values[parent], values[child] = values[child], values[parent]
+        root = child - offset
+
+
+# Buckets up to this size are finished by insertion sort instead of another radix pass
+RADIX_SMALL_BUCKET = 64
+# Bytes per radix digit: buckets are keyed by two-byte chunks, which halves the passes over the keys
+RADIX_WIDTH = 2
+
+
+# Radix sort algorithm for sorting objects based on a string attribute
+def radix_sort(objects, get_attribute):
+    """
+    Radix sort algorithm for sorting objects based on a string attribute.
+    Most significant digit first: each attribute is encoded once to UTF-8, whose byte order is
+    the code point order of the strings, so any Unicode name sorts like Python's string comparison.
+    Each range is split into buckets by the RADIX_WIDTH bytes at its depth, after skipping the bytes
+    shared by every key in it; small buckets are insertion sorted. The sort is stable.
     Args:
     - objects: List of objects to sort.
     - get_attribute: A function that extracts the attribute to sort by.
-    - position: The character position to sort by.
+
+    Returns:
+    - A new sorted list.
     """
-    output = [None] * len(objects)
-    count = [0] * 256
+    if not objects:
+        return objects
+    keys = [get_attribute(obj).encode("utf-8") for obj in objects]
+    values = list(objects)
 
-    # Store the count of each character
-    for obj in objects:
-        char = get_attribute(obj)[position] if position < len(get_attribute(obj)) else chr(0)
-        count[ord(char)] += 1
+    # Ranges still to sort, as (low, high, depth), with keys[low:high] sharing their first depth bytes
+    pending = [(0, len(values), 0)]
+    while pending:
+        low, high, depth = pending.pop()
+        if high - low <= RADIX_SMALL_BUCKET:
+            _insertion_sort_run(keys, values, low, high)
+            continue
 
-    # Change count[i] so that count[i] now contains the actual
-    # position of this character in the output array
-    for i in range(1, 256):
-        count[i] += count[i - 1]
+        # Skip the prefix shared by every key in the range (the prefix shared by its least and greatest keys)
+        smallest, largest = min(keys[low:high]), max(keys[low:high])
+        if smallest == largest:
+            continue
+        while depth < len(smallest) and smallest[depth] == largest[depth]:
+            depth += 1
 
-    # Build the output array
-    for obj in reversed(objects):
-        char = get_attribute(obj)[position] if position < len(get_attribute(obj)) else chr(0)
-        output[count[ord(char)] - 1] = obj
-        count[ord(char)] -= 1
+        # Distribute by the RADIX_WIDTH bytes at depth. Shorter chunks sort first, so keys that end
+        # inside the chunk come before the keys they are a prefix of
+        next_depth = depth + RADIX_WIDTH
+        buckets = {}
+        for index in range(low, high):
+            chunk = keys[index][depth:next_depth]
+            bucket = buckets.get(chunk)
+            if bucket is None:
+                buckets[chunk] = [index]
+            else:
+                bucket.append(index)
 
-    return output
\ No newline at end of file
+        order = []
+        start = low
+        for chunk in sorted(buckets):
+            bucket = buckets[chunk]
+            order += bucket
+            end = start + len(bucket)
+            if end - start > 1 and len(chunk) == RADIX_WIDTH:
+                pending.append((start, end, next_depth))
+            start = end
+        keys[low:high] = [keys[index] for index in order]
+        values[low:high] = [values[index] for index in order]
+    return values
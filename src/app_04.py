@@ -1,14 +1,14 @@
 import streamlit as st
-from collections import deque
 from booking_manager_03 import BookingManager
-from cl.graph import Graph
-from algorithms.searchers import FlightRedBlackTree, PassengerBST
-from utils import parse_airline_res_db
+from journal import Journal, journal_path_for
+from reload import DBReloader
+from snapshot import load_airline_res_db
+from storage import SQLiteStorage, sqlite_path_for
 import pandas as pd
 import re 
 import os
 from streamlit.components.v1 import html
-from algorithms.sorters import merge_sort, quick_sort, radix_sort
+from algorithms.sorters import merge_sort, radix_sort
 
 
 # Path to the AirlineResDB.txt file (use the commented out line 14 in local environment only)
@@ -18,81 +18,30 @@ from algorithms.sorters import merge_sort, quick_sort, radix_sort
 script_dir = os.path.dirname(os.path.abspath(__file__))
 airline_res_db_path = os.path.join(script_dir, 'AirlineResDB.txt')
 
-# Parse the AirlineResDB.txt file
-airline_res_db = parse_airline_res_db(airline_res_db_path)
-
-# Extract relevant data
-airport_data = {entry["Airport_code"]: entry for entry in airline_res_db["Airport"]}
-flight_data = {entry["Flight_number"]: entry for entry in airline_res_db["Flight"]}
-seat_reservations = airline_res_db["Seat_reservation"]
-leg_instance_data = airline_res_db["Leg_instance"]
-
-# Initialize data structures
-flights_graph = Graph()  # Graph to store flight information
-passengers_graph = Graph()  # Graph to store passenger information
-flights_table = FlightRedBlackTree()  # RedBlackTree table to quickly search flights
-passengers_tree = PassengerBST()  # Binary search tree to quickly search passengers
-flights_stack = []  # Stack to store flights
-confirmed_passengers_stack = []  # Stack to store confirmed passengers
-waitlisted_passengers_queue = deque()  # Queue to store waitlisted passengers
-
-# Populate flights from the parsed data
-for flight in flight_data.values():
-    flight_number = flight["Flight_number"]
-    departure = flight.get("Departure_airport", "Unknown")
-    arrival = flight.get("Arrival_airport", "Unknown")
-    flight_leg = next(
-        (leg for leg in airline_res_db["Flight_leg"] if leg["Flight_number"] == flight_number),
-        None
-    )
-    if flight_leg:
-        departure = flight_leg["Departure_airport_code"]
-        arrival = flight_leg["Arrival_airport_code"]
+@st.cache_resource
+def load_booking_manager(db_path):
+    """
+    Parse the AirlineResDB.txt file and build the BookingManager.
+    Cached per process, so every session shares one thread-safe manager and the file is
+    only parsed once instead of on every rerun. Later edits to the file are applied incrementally.
+    """
+    # Parse the AirlineResDB.txt file (or load its snapshot, see snapshot.py)
+    booking_manager = BookingManager.from_airline_res_db(load_airline_res_db(db_path), thread_safe=True)
+
+    # Restore the bookings made before the last restart and store the new ones, in a journal (see journal.py)
+    # or, with BOOKING_STORAGE=sqlite, in an SQLite database (see storage.py)
+    if os.environ.get('BOOKING_STORAGE') == 'sqlite':
+        booking_manager.attach_storage(SQLiteStorage(sqlite_path_for(db_path)))
     else:
-        departure = "Unknown"
-        arrival = "Unknown"
-        
-    weekdays = flight.get("Weekdays", "Unknown")
-    seating_list = {
-        "First": [1, 5, 9, 11, 21],
-        "Business": list(range(6, 16)),
-        "Economy": list(range(16, 36))
-    }
-    flights_stack.append([flight_number, departure, arrival, weekdays, seating_list])
-    flights_graph.add_node(flight_number, {
-        "departure": departure,
-        "arrival": arrival,
-        "weekdays": weekdays,
-        "seating_list": seating_list
-    })
-    flights_table.insert([flight_number, departure, arrival, weekdays])
-
-# Populate seat reservations
-for reservation in seat_reservations:
-    passenger_id = reservation["Customer_phone"]
-    passenger_name = reservation["Customer_name"]
-    flight_number = reservation["Flight_number"]
-    seat_number = reservation["Seat_number"]
-    # Infer seat class from seat number (e.g., "1A" → "First")
-    seat_class = "First" if seat_number[0] in ["1", "F"] else "Business" if seat_number[0] in ["2", "B"] else "Economy"
-    confirmed_passengers_stack.append([passenger_id, passenger_name, flight_number, seat_number, seat_class])
-
-# Create the BookingManager and store it in the session state
-if 'manager' not in st.session_state:
-    st.session_state['manager'] = BookingManager(
-        flights_graph,
-        passengers_graph,
-        flights_table,
-        passengers_tree,
-        flights_stack,
-        confirmed_passengers_stack,
-        waitlisted_passengers_queue,
-        airport_data,
-        flight_data,
-        leg_instance_data
-    )
-else:
-    manager = st.session_state['manager']
+        booking_manager.attach_storage(Journal(journal_path_for(db_path)))
+
+    # Pick up edits to the DB file without a restart (see reload.py)
+    DBReloader(booking_manager, db_path).start()
+    return booking_manager
+
+
+# Share the process-wide BookingManager with this session
+st.session_state['manager'] = load_booking_manager(airline_res_db_path)
 
 
 def book_passenger():
@@ -105,7 +54,7 @@ def book_passenger():
         flight_number = st.session_state.booking_flight_number
 
         # Check if the flight has "Unknown" departure or arrival
-        flight = next((f for f in st.session_state['manager'].flights_stack if f[0] == flight_number), None)
+        flight = st.session_state['manager'].flight_entries.get(flight_number)
         if flight and (flight[1] == "Unknown" or flight[2] == "Unknown"):
             # Validate and update departure and arrival airports
             departure = st.session_state.get('booking_departure_airport', '').strip()
@@ -117,9 +66,8 @@ def book_passenger():
             if departure not in st.session_state['manager'].airport_data or arrival not in st.session_state['manager'].airport_data:
                 return "Invalid airport codes. Please check and try again."
 
-            # Update the flight details
-            flight[1] = departure
-            flight[2] = arrival
+            # Update the flight details through the manager, so they are locked, stored and re-rendered
+            st.session_state['manager'].upsert_flight(flight_number, departure, arrival, flight[3], flight[4])
 
         # Proceed with booking
         result = st.session_state['manager'].book_passenger(
@@ -205,33 +153,11 @@ def get_available_flights():
     search_query = st.text_input("Enter search query", key="search_query", placeholder="E.g., A123 or SFO")
     sort_option = st.selectbox("Sort by", ["None", "Flight Number", "Departure Airport", "Arrival Airport", "Available Seats"], key="sort_option")
 
-    flights_info = []
-    for flight in st.session_state['manager'].flights_stack:
-        flight_number, departure, arrival, weekdays, seating_list = flight
-
-        # Count booked and available seats by class
-        booked_seats = {cls: 0 for cls in seating_list.keys()}
-        available_seats = {cls: len(seats) for cls, seats in seating_list.items()}
-
-        for passenger in st.session_state['manager'].confirmed_passengers_stack:
-            if passenger[2] == flight_number:
-                seat_class = passenger[4]
-                booked_seats[seat_class] += 1
-                available_seats[seat_class] -= 1
-
-        # Retrieve departure and arrival airport names
-        departure_airport = st.session_state['manager'].airport_data.get(departure, {}).get("Name", departure)
-        arrival_airport = st.session_state['manager'].airport_data.get(arrival, {}).get("Name", arrival)
-
-        # Add flight details to the list
-        flights_info.append({
-            "Flight Number": flight_number,
-            "Departure": f"{departure_airport} ({departure})",
-            "Arrival": f"{arrival_airport} ({arrival})",
-            "Weekdays": weekdays,
-            "Booked Seats": booked_seats,
-            "Available Seats": sum(available_seats.values())
-        })
+    # Rows are rendered by the manager and cached until their flight changes
+    manager = st.session_state['manager']
+    # A flight removed by another session since the stack was read has no row
+    flights_info = [manager.get_flight_row(flight[0]) for flight in list(manager.flights_stack)]
+    flights_info = [flight for flight in flights_info if flight is not None]
 
     # Apply search filter
     if search_option != "None" and search_query:
@@ -251,10 +177,12 @@ def get_available_flights():
         elif sort_option == "Arrival Airport":
             flights_info = merge_sort(flights_info, key=lambda x: x["Arrival"])
         elif sort_option == "Available Seats":
-            flights_info = quick_sort(flights_info, key=lambda x: x["Available Seats"])
+            flights_info = merge_sort(flights_info, key=lambda x: x["Available Seats"])
 
     # Display the flight information
     if flights_info:
+        # Per-class counts of every flight, taken in one pass over the bookings
+        occupancy = manager.occupancy()
         st.write("### Available Flights")
         for flight in flights_info:
             st.write(f"**Flight Number:** {flight['Flight Number']}")
@@ -262,8 +190,8 @@ def get_available_flights():
             st.write(f"**Arrival:** {flight['Arrival']}")
             st.write(f"**Weekdays:** {flight['Weekdays']}")
             st.write("**Seats by Class:**")
-            for cls, count in flight["Booked Seats"].items():
-                st.write(f"- {cls}: {count} booked, {flight['Available Seats']} available")
+            for cls, (booked, available, load_factor) in occupancy.get(flight["Flight Number"], {}).items():
+                st.write(f"- {cls}: {booked} booked, {available} available ({load_factor:.0%} full)")
             st.markdown("---")
     else:
         st.info("No flights available.")
@@ -0,0 +1,298 @@
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import date, timedelta
+from booking_manager_03 import BookingManager
+from cl.graph import Graph
+from algorithms.searchers import FlightRedBlackTree, PassengerBST
+from algorithms.sorters import merge_sort, quick_sort, radix_sort
+from journal import Journal
+from records import LegInstance, SeatReservation
+from storage import SQLiteStorage
+from utils import format_time, parse_airline_res_dbs
+
+
+def measure_memory(build):
+    """
+    Measure the memory held by the object returned from build.
+
+    Args:
+    - build: Function building the data to measure.
+
+    Returns:
+    - The number of bytes still allocated once build returns.
+    """
+    tracemalloc.start()
+    try:
+        data = build()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del data
+    return size
+
+
+def synthetic_rows(count):
+    """
+    Yield (section, values) pairs shaped like the Leg_instance and Seat_reservation rows of the DB,
+    with values already typed the way utils.compile_row_decoder converts them.
+    """
+    day = date(2018, 1, 28)
+    for i in range(count):
+        flight_number = f"F{i % 5000}"
+        if i % 2:
+            yield LegInstance, (flight_number, 1, day, 3, f"P{i % 300}", "SCK", 1055, "IWA", 1219)
+        else:
+            yield SeatReservation, (flight_number, 1, day, f"{i % 36}A", f"Passenger{i}", f"555-{i % 10000:04d}")
+
+
+def bench_records(count):
+    """
+    Compare the memory used by count rows held as dictionaries and as record types.
+    """
+    rows = list(synthetic_rows(count))
+    as_dicts = measure_memory(lambda: [dict(zip(record._fields, values)) for record, values in rows])
+    as_records = measure_memory(lambda: [record(*values) for record, values in rows])
+    print(f"{count} rows as dictionaries: {as_dicts / 2 ** 20:.1f} MiB ({as_dicts / count:.0f} bytes/row)")
+    print(f"{count} rows as records:      {as_records / 2 ** 20:.1f} MiB ({as_records / count:.0f} bytes/row)")
+
+
+def write_synthetic_shards(directory, shards, rows):
+    """
+    Write shards AirlineResDB-format files with rows Leg_instance and rows Seat_reservation rows each.
+    Every shard covers its own dates, so no row key repeats across files.
+    """
+    for shard in range(shards):
+        day = date(2018, 1, 1) + timedelta(days=shard)
+        lines = [
+            "Leg_instance = {",
+            "\tFlight_number, Leg_number, Date:date, Number_of_available_seats, Airplane_id, "
+            "Departure_airport_code, Departure_time, Arrival_airport_code, Arrival_time",
+        ]
+        lines += [
+            f"\tF{i}, 1, {day.isoformat()}, 3, P{i % 300}, SCK, {format_time(i % 1440)}, IWA, {format_time((i + 90) % 1440)}"
+            for i in range(rows)
+        ]
+        lines += ["}", "Seat_reservation = {", "\tFlight_number, Leg_number, Date:date, Seat_number, Customer_name, PassengerID"]
+        lines += [f"\tF{i}, 1, {day.isoformat()}, 1A, Passenger{i}, 555-{i % 10000:04d}" for i in range(rows)]
+        lines.append("}")
+        with open(os.path.join(directory, f"AirlineResDB-{shard:03d}.txt"), "w") as file:
+            file.write("\n".join(lines) + "\n")
+
+
+def bench_ingest(shards, rows, max_workers):
+    """
+    Compare parse_airline_res_dbs on synthetic shard files in one process and in a process pool.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        write_synthetic_shards(directory, shards, rows)
+        pattern = os.path.join(directory, "AirlineResDB-*.txt")
+
+        start = time.perf_counter()
+        parse_airline_res_dbs(pattern, max_workers=1)
+        sequential = time.perf_counter() - start
+
+        start = time.perf_counter()
+        parse_airline_res_dbs(pattern, max_workers=max_workers)
+        parallel = time.perf_counter() - start
+    workers = max_workers or os.cpu_count()
+    print(f"{shards} files x {2 * rows} rows, in one process: {sequential:.2f}s")
+    print(f"{shards} files x {2 * rows} rows, {workers} workers:    {parallel:.2f}s ({sequential / parallel:.1f}x)")
+
+
+def synthetic_manager(flights, thread_safe=True):
+    """
+    Build a BookingManager with empty flights F0..F<flights - 1> of 1000 Economy seats each.
+    """
+    flights_graph = Graph()
+    for i in range(flights):
+        flights_graph.add_node(f"F{i}", {"seating_list": {"Economy": list(range(1, 1001))}})
+    return BookingManager(
+        flights_graph, Graph(), FlightRedBlackTree(), PassengerBST(), [], [], None,
+        airport_data={}, flight_data={}, leg_instance_data=[], thread_safe=thread_safe
+    )
+
+
+def bench_journal(bookings, threads):
+    """
+    Measure journaled booking throughput with one thread and with several threads sharing fsyncs.
+    """
+    for thread_count in sorted({1, threads}):
+        with tempfile.TemporaryDirectory() as directory:
+            manager = synthetic_manager(64)
+            manager.attach_storage(Journal(os.path.join(directory, "bench.journal"), checkpoint_every=bookings + 1))
+
+            def worker(worker_id):
+                for i in range(worker_id, bookings, thread_count):
+                    manager.book_passenger([f"555-{i % 10000:04d}", f"P{i}"], f"F{i // 10000 % 64}", "Economy")
+
+            workers = [threading.Thread(target=worker, args=(worker_id,)) for worker_id in range(thread_count)]
+            start = time.perf_counter()
+            for thread in workers:
+                thread.start()
+            for thread in workers:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            writes = manager.storage.writes
+            manager.storage.close()
+        print(f"{thread_count} thread(s): {bookings / elapsed:.0f} bookings/s, {writes} fsyncs for {bookings} bookings")
+
+
+def bench_storage(bookings, queries):
+    """
+    Compare booking throughput and passenger status latency in memory only, with a journal and with SQLite.
+    """
+    backends = {
+        "memory": lambda directory: None,
+        "journal": lambda directory: Journal(os.path.join(directory, "bench.journal"), checkpoint_every=bookings + 1),
+        "sqlite": lambda directory: SQLiteStorage(os.path.join(directory, "bench.sqlite3")),
+    }
+    for name, open_storage in backends.items():
+        with tempfile.TemporaryDirectory() as directory:
+            manager = synthetic_manager(64, thread_safe=False)
+            storage = open_storage(directory)
+            if storage is not None:
+                manager.attach_storage(storage)
+
+            start = time.perf_counter()
+            for i in range(bookings):
+                manager.book_passenger([f"555-{i % 10000:04d}", f"P{i}"], f"F{i % 64}", "Economy")
+            booking_time = time.perf_counter() - start
+
+            passenger_ids = [f"555-{i * 7919 % bookings % 10000:04d}" for i in range(queries)]
+            start = time.perf_counter()
+            for passenger_id in passenger_ids:
+                manager.get_passenger_status(passenger_id)
+            status_time = time.perf_counter() - start
+            line = f"{name:8} {bookings / booking_time:8.0f} bookings/s, status {status_time / queries * 1e6:6.1f} us"
+
+            if isinstance(storage, SQLiteStorage):
+                start = time.perf_counter()
+                for passenger_id in passenger_ids:
+                    storage.passenger_status(passenger_id)
+                line += f" (SQL query {(time.perf_counter() - start) / queries * 1e6:.1f} us)"
+            if storage is not None:
+                storage.close()
+        print(line)
+
+
+def bench_batch(requests, flights):
+    """
+    Compare book_many with a book_passenger loop, in memory only and with a journal.
+    PassengerIDs only have 10000 values, so requests are made in rounds of at most 10000 distinct
+    passengers, each round on a new manager with flights of 1000 Economy seats.
+    """
+    rounds = [range(start, min(start + 10000, requests)) for start in range(0, requests, 10000)]
+    backends = {
+        "memory": lambda directory: None,
+        "journal": lambda directory: Journal(os.path.join(directory, "bench.journal"), checkpoint_every=requests + 1),
+    }
+    for name, open_storage in backends.items():
+        elapsed = {"loop": 0.0, "book_many": 0.0}
+        for mode in elapsed:
+            for batch in rounds:
+                with tempfile.TemporaryDirectory() as directory:
+                    manager = synthetic_manager(flights)
+                    storage = open_storage(directory)
+                    if storage is not None:
+                        manager.attach_storage(storage)
+                    batch_requests = [([f"555-{i % 10000:04d}", f"P{i}"], f"F{i % flights}", "Economy") for i in batch]
+                    start = time.perf_counter()
+                    if mode == "loop":
+                        for passenger, flight_number, seat_class in batch_requests:
+                            manager.book_passenger(passenger, flight_number, seat_class)
+                    else:
+                        manager.book_many(batch_requests)
+                    elapsed[mode] += time.perf_counter() - start
+                    if storage is not None:
+                        storage.close()
+        print(
+            f"{name:8} {requests} requests: book_passenger loop {elapsed['loop']:.2f}s, "
+            f"book_many {elapsed['book_many']:.2f}s ({elapsed['loop'] / elapsed['book_many']:.1f}x)"
+        )
+
+
+def synthetic_bookings(count, seed=0):
+    """
+    Return count booking lists with random passenger names, flight numbers and seat classes.
+    """
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return [
+        [
+            f"555-{i % 10000:04d}",
+            rng.choice(letters).upper() + "".join(rng.choice(letters) for _ in range(rng.randint(3, 9))),
+            f"{rng.choice(['HA', 'UA', 'WN', 'G4'])}{rng.randint(1, 9999)}",
+            f"{rng.randint(1, 40)}{rng.choice('ABCDEF')}",
+            rng.choice(["First", "Business", "Economy"]),
+        ]
+        for i in range(count)
+    ]
+
+
+def bench_sorts(count):
+    """
+    Time the sorts used by the manager and the app on synthetic bookings, against the built-in sort.
+    """
+    bookings = synthetic_bookings(count)
+    # Stable sorts must match sorted() exactly; quick_sort may reorder objects with equal keys
+    cases = [
+        ("merge_sort by name", lambda objects: merge_sort(objects, key=lambda x: x[1]), lambda x: x[1], True),
+        ("merge_sort by seat class", lambda objects: merge_sort(objects, key=lambda x: x[4]), lambda x: x[4], True),
+        ("quick_sort by seat class", lambda objects: quick_sort(objects, key=lambda x: x[4]), lambda x: x[4], False),
+        ("quick_sort by flight", lambda objects: quick_sort(objects, key=lambda x: x[2]), lambda x: x[2], False),
+        ("radix_sort by flight", lambda objects: radix_sort(objects, lambda x: x[2]), lambda x: x[2], True),
+        ("radix_sort by name", lambda objects: radix_sort(objects, lambda x: x[1]), lambda x: x[1], True),
+    ]
+    for name, sort, key, stable in cases:
+        objects = list(bookings)
+        start = time.perf_counter()
+        result = sort(objects)
+        elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        expected = sorted(bookings, key=key)
+        builtin = time.perf_counter() - start
+        if stable:
+            assert result == expected
+        else:
+            assert [key(x) for x in result] == [key(x) for x in expected]
+        print(f"{name:24} {count} bookings: {elapsed:.2f}s (built-in sorted: {builtin:.2f}s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks for the airline booking system.")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+    records_parser = subparsers.add_parser("records", help="Memory of parsed rows as dictionaries vs records.")
+    records_parser.add_argument("--rows", type=int, default=1_000_000)
+    ingest_parser = subparsers.add_parser("ingest", help="Sequential vs parallel parsing of many DB files.")
+    ingest_parser.add_argument("--shards", type=int, default=16)
+    ingest_parser.add_argument("--rows", type=int, default=50_000)
+    ingest_parser.add_argument("--workers", type=int, default=None)
+    journal_parser = subparsers.add_parser("journal", help="Journaled booking throughput with group commit.")
+    journal_parser.add_argument("--bookings", type=int, default=5000)
+    journal_parser.add_argument("--threads", type=int, default=8)
+    storage_parser = subparsers.add_parser("storage", help="Booking throughput and status latency per storage backend.")
+    storage_parser.add_argument("--bookings", type=int, default=5000)
+    storage_parser.add_argument("--queries", type=int, default=5000)
+    batch_parser = subparsers.add_parser("batch", help="book_many vs a book_passenger loop.")
+    batch_parser.add_argument("--requests", type=int, default=100_000)
+    batch_parser.add_argument("--flights", type=int, default=8)
+    sorts_parser = subparsers.add_parser("sorts", help="Sorting algorithms on synthetic bookings.")
+    sorts_parser.add_argument("--count", type=int, default=200_000)
+    args = parser.parse_args()
+    if args.benchmark == "records":
+        bench_records(args.rows)
+    elif args.benchmark == "ingest":
+        bench_ingest(args.shards, args.rows, args.workers)
+    elif args.benchmark == "journal":
+        bench_journal(args.bookings, args.threads)
+    elif args.benchmark == "storage":
+        bench_storage(args.bookings, args.queries)
+    elif args.benchmark == "batch":
+        bench_batch(args.requests, args.flights)
+    elif args.benchmark == "sorts":
+        bench_sorts(args.count)
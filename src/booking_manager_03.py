@@ -1,24 +1,485 @@
 from collections import deque
+from contextlib import contextmanager, nullcontext
+from functools import partial, wraps
+from operator import attrgetter
+from algorithms.searchers import FlightRedBlackTree, PassengerBST
 from algorithms.sorters import merge_sort, quick_sort 
+from cl.cache import VersionedCache
+from cl.columnar import ReservationColumns
+from cl.graph import Graph
+from cl.inventory import SeatInventory
+from cl.legs import LegInstanceIndex
+from cl.waitlist import WaitlistQueue
+from itertools import count, islice, repeat
+import gc
 import re
+from records import Booking, WaitlistEntry
+import threading
+from utils import format_time
+
+PASSENGER_ID_PATTERN = re.compile(r"^555-\d{4}$")
+INVALID_PASSENGER_ID_MESSAGE = "PassengerID must be in the format '555-xxxx' (e.g., 555-1234)."
+NO_LOCK = nullcontext()
+
+
+def _field(record, name, default="Unknown"):
+    """
+    Read a field of a DB record (see records.py), falling back to default when the record
+    or the value is missing.
+    """
+    value = getattr(record, name, None)
+    return default if value is None else value
+
+
+def _remove_value(values, value):
+    """
+    Remove the first item equal to value from a list, if there is one.
+    """
+    try:
+        values.remove(value)
+    except ValueError:
+        pass
+
+
+def durable(method):
+    """
+    Make a mutating BookingManager method commit its changes to the attached storage before returning.
+    Nested calls (e.g., manage_waitlist inside cancel_booking) leave the commit to the outermost call,
+    which runs after every lock is released, so each request commits once and concurrent requests
+    can share one commit. The outermost call also holds the storage's transaction() from start to commit.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.storage is None:
+            return method(self, *args, **kwargs)
+        depth = getattr(self._storage_calls, "depth", 0)
+        if depth:
+            self._storage_calls.depth = depth + 1
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self._storage_calls.depth = depth
+        # The storage's transaction is entered before any lock, so waiting for it cannot deadlock
+        self._storage_calls.depth = 1
+        try:
+            with self.storage.transaction():
+                try:
+                    return method(self, *args, **kwargs)
+                finally:
+                    self.storage.commit()
+        finally:
+            self._storage_calls.depth = 0
+            if self.storage.checkpoint_due():
+                self.checkpoint()
+    return wrapper
+
+
+def flight_endpoints(legs):
+    """
+    Return the (departure, arrival) airport codes of a flight: the departure of its lowest-numbered
+    leg and the arrival of its highest-numbered leg, or ("Unknown", "Unknown") without legs.
+
+    Args:
+    - legs: The flight's Flight_leg records, in any order.
+    """
+    if not legs:
+        return "Unknown", "Unknown"
+    first = min(legs, key=attrgetter("Leg_number"))
+    last = max(legs, key=attrgetter("Leg_number"))
+    return first.Departure_airport_code, last.Arrival_airport_code
+
+
+def default_seating_list():
+    """
+    Return the seat numbers by class given to flights loaded from the DB file.
+    """
+    return {
+        "First": [1, 5, 9, 11, 21],
+        "Business": list(range(6, 16)),
+        "Economy": list(range(16, 36))
+    }
+
 
 class BookingManager:
-    def __init__(self, flights_graph, passengers_graph, flights_table, passengers_tree, flights_stack, confirmed_passengers_stack, waitlisted_passengers_queue, airport_data, flight_data, leg_instance_data):
+    # Compact the confirmed stack once tombstones outnumber live bookings (and at least this many exist)
+    COMPACTION_THRESHOLD = 64
+
+    def __init__(self, flights_graph, passengers_graph, flights_table, passengers_tree, flights_stack, confirmed_passengers_stack, waitlisted_passengers_queue, airport_data, flight_data, leg_instance_data, flight_leg_data=None, thread_safe=False, lock_stripes=64):
+        """
+        Args:
+        - thread_safe: If True, guard the manager with locks so it can be shared between threads.
+          Per-flight state is locked by flight, striped over lock_stripes locks, so operations on
+          different flights do not wait for each other.
+        - lock_stripes: Number of flight locks (and of passenger locks) when thread_safe is True.
+        """
+        self.thread_safe = thread_safe
+        self.storage = None  # Durable storage of booking changes (journal.py, storage.py), see attach_storage
+        self._storage_calls = threading.local()
+        self._flight_locks = [threading.RLock() for _ in range(lock_stripes)] if thread_safe else []
+        self._passenger_locks = [threading.RLock() for _ in range(lock_stripes)] if thread_safe else []
+        self._stack_lock = threading.RLock() if thread_safe else NO_LOCK
         self.flights_graph = flights_graph
         self.passengers_graph = passengers_graph
         self.flights_table = flights_table
         self.passengers_tree = passengers_tree
         self.flights_stack = flights_stack
+        self.flight_entries = {flight[0]: flight for flight in flights_stack}  # flight_number -> flights_stack entry
+        self.occupancy_version = 0  # Bumped under the stack lock whenever a booking or a flight changes, see occupancy
         self.confirmed_passengers_stack = confirmed_passengers_stack
-        self.waitlisted_passengers_queue = waitlisted_passengers_queue or {
+        waitlisted_passengers_queue = waitlisted_passengers_queue or {
             "First": deque(),
             "Business": deque(),
             "Economy": deque()
         }
+        self.seat_classes = list(waitlisted_passengers_queue.keys())
+        self.waitlists = {}  # (flight_number, seat_class) -> WaitlistQueue
+        self._waitlist_sequence = count()  # Global arrival order across all waitlists
+        for seat_class, queue in waitlisted_passengers_queue.items():
+            for passenger in queue:
+                self._get_waitlist_queue(passenger[2], seat_class).append(passenger, next(self._waitlist_sequence))
         self.airport_data = airport_data  # Use parsed airport data
         self.flight_data = flight_data  # Use parsed flight data
         self.leg_instance_data = leg_instance_data # Use parsed leg instance data
+        self.leg_instances = LegInstanceIndex(leg_instance_data)  # (flight_number, leg_number, date) -> leg instance
+        self.flight_leg_data = flight_leg_data or []  # Use parsed flight leg data
+        self.passenger_index = {}  # PassengerID -> {flight_number: (status, seat_class, record)}
+        self.flight_bookings = {}  # flight_number -> {PassengerID: booking} in booking order
+        self.seat_inventory = {}  # (flight_number, seat_class) -> SeatInventory
+        self.routes = {}  # flight_number -> (origin, destination)
+        self.flights_by_route = {}  # (origin, destination) -> [flight_number]
+        self.legs_by_flight = {}  # flight_number -> [flight leg] in file order
+        self.flight_versions = {}  # flight_number -> change counter, bumped whenever a rendering of the flight may change
+        self.render_cache = VersionedCache()  # Rendered flight info and flight rows, see get_flight_info
+        self._build_passenger_index()
+        self._build_seat_inventory()
+        self._build_routes()
+
+    @classmethod
+    def from_airline_res_db(cls, airline_res_db, thread_safe=False):
+        """
+        Build a BookingManager from parsed AirlineResDB data.
+
+        Args:
+        - airline_res_db: Mapping of section names to records (see utils.parse_airline_res_db).
+        - thread_safe: See __init__.
+
+        Returns:
+        - A BookingManager with every flight of the DB and its seat reservations as confirmed bookings.
+        """
+        # Extract relevant data
+        airport_data = {entry.Airport_code: entry for entry in airline_res_db["Airport"]}
+        flight_data = {entry.Flight_number: entry for entry in airline_res_db["Flight"]}
+        seat_reservations = airline_res_db["Seat_reservation"]
+        leg_instance_data = airline_res_db["Leg_instance"]
+
+        # Initialize data structures
+        flights_graph = Graph()  # Graph to store flight information
+        passengers_graph = Graph()  # Graph to store passenger information
+        flights_table = FlightRedBlackTree()  # RedBlackTree table to quickly search flights
+        passengers_tree = PassengerBST()  # Binary search tree to quickly search passengers
+        flights_stack = []  # Stack to store flights
+        confirmed_passengers_stack = []  # Stack to store confirmed passengers
+        waitlisted_passengers_queue = deque()  # Queue to store waitlisted passengers
+
+        # Legs of every flight, grouped in one pass
+        legs_by_flight = {}
+        for leg in airline_res_db["Flight_leg"]:
+            legs_by_flight.setdefault(leg.Flight_number, []).append(leg)
+
+        # Populate flights from the parsed data
+        for flight in flight_data.values():
+            flight_number = flight.Flight_number
+            departure, arrival = flight_endpoints(legs_by_flight.get(flight_number))
+
+            weekdays = flight.Weekdays or "Unknown"
+            seating_list = default_seating_list()
+            flights_stack.append([flight_number, departure, arrival, weekdays, seating_list])
+            flights_graph.add_node(flight_number, {
+                "departure": departure,
+                "arrival": arrival,
+                "weekdays": weekdays,
+                "seating_list": seating_list
+            })
+            flights_table.insert([flight_number, departure, arrival, weekdays])
+
+        # Populate seat reservations
+        for reservation in seat_reservations:
+            # Infer seat class from seat number (e.g., "1A" → "First")
+            confirmed_passengers_stack.append(Booking.from_reservation(reservation))
+
+        return cls(
+            flights_graph,
+            passengers_graph,
+            flights_table,
+            passengers_tree,
+            flights_stack,
+            confirmed_passengers_stack,
+            waitlisted_passengers_queue,
+            airport_data,
+            flight_data,
+            leg_instance_data,
+            flight_leg_data=airline_res_db["Flight_leg"],
+            thread_safe=thread_safe
+        )
+
+    def _flight_lock(self, flight_number):
+        """
+        Return the lock guarding a flight's seat inventory, waitlists and bookings.
+        Locks are always taken in the order flight, then passenger, then stack.
+        """
+        if not self.thread_safe:
+            return NO_LOCK
+        return self._flight_locks[hash(flight_number) % len(self._flight_locks)]
+
+    @contextmanager
+    def _flights_lock(self, flight_numbers=None):
+        """
+        Hold the locks of several flights at once (all flights if flight_numbers is None),
+        taking the stripes in a fixed order.
+        """
+        if not self.thread_safe:
+            yield
+            return
+        if flight_numbers is None:
+            stripes = range(len(self._flight_locks))
+        else:
+            stripes = sorted({hash(flight_number) % len(self._flight_locks) for flight_number in flight_numbers})
+        for stripe in stripes:
+            self._flight_locks[stripe].acquire()
+        try:
+            yield
+        finally:
+            for stripe in reversed(stripes):
+                self._flight_locks[stripe].release()
+
+    def _passenger_lock(self, passenger_id):
+        """
+        Return the lock guarding a passenger's entries in the passenger index.
+        """
+        if not self.thread_safe:
+            return NO_LOCK
+        return self._passenger_locks[hash(passenger_id) % len(self._passenger_locks)]
+
+    @contextmanager
+    def _passengers_lock(self, passenger_ids):
+        """
+        Hold the locks of several passengers at once, taking the stripes in a fixed order.
+        """
+        if not self.thread_safe:
+            yield
+            return
+        stripes = sorted({hash(passenger_id) % len(self._passenger_locks) for passenger_id in passenger_ids})
+        for stripe in stripes:
+            self._passenger_locks[stripe].acquire()
+        try:
+            yield
+        finally:
+            for stripe in reversed(stripes):
+                self._passenger_locks[stripe].release()
+
+    @property
+    def confirmed_passengers_stack(self):
+        """
+        The confirmed bookings in booking order. Cancelled slots are compacted away before returning.
+        Every change to the stack holds the stack lock, so in thread-safe mode a copy taken under it is returned.
+        """
+        with self._stack_lock:
+            if self._tombstones:
+                self._compact_confirmed()
+            return list(self._confirmed) if self.thread_safe else self._confirmed
+
+    @confirmed_passengers_stack.setter
+    def confirmed_passengers_stack(self, passengers):
+        with self._stack_lock:
+            self._confirmed = passengers
+            self._tombstones = 0
+            self._confirmed_slots = {
+                (passenger[0], passenger[2]): slot for slot, passenger in enumerate(passengers)
+            }
+            self.reservation_columns = ReservationColumns(passengers)
+            self.occupancy_version += 1
+
+    @property
+    def waitlisted_passengers_queue(self):
+        """
+        Read-only view of all waitlists grouped by class, in global arrival order.
+        The flight locks are held while reading, as the waitlists are added to and changed under them.
+        """
+        entries = {seat_class: [] for seat_class in self.seat_classes}
+        with self._flights_lock():
+            for (_, seat_class), queue in self.waitlists.items():
+                if seat_class in entries:
+                    entries[seat_class].extend(queue.items())
+        view = {}
+        for seat_class, class_entries in entries.items():
+            class_entries.sort(key=lambda entry: entry[0])
+            view[seat_class] = deque(passenger for _, passenger in class_entries)
+        return view
+
+    def _get_waitlist_queue(self, flight_number, seat_class):
+        """
+        Return the waitlist queue for a flight and class, creating it on first use.
+        """
+        queue = self.waitlists.get((flight_number, seat_class))
+        if queue is None:
+            queue = self.waitlists[(flight_number, seat_class)] = WaitlistQueue()
+        return queue
+
+    def _compact_confirmed(self):
+        """
+        Drop cancelled (None) slots from the confirmed stack, keeping booking order.
+        """
+        self._confirmed[:] = [passenger for passenger in self._confirmed if passenger is not None]
+        self._tombstones = 0
+        self._confirmed_slots = {
+            (passenger[0], passenger[2]): slot for slot, passenger in enumerate(self._confirmed)
+        }
+
+    def _push_confirmed(self, passenger):
+        """
+        Push a booking onto the confirmed stack and record its slot.
+        """
+        with self._stack_lock:
+            self._confirmed_slots[(passenger[0], passenger[2])] = len(self._confirmed)
+            self._confirmed.append(passenger)
+            self.reservation_columns.add(passenger)
+            self.occupancy_version += 1
+
+    def _push_confirmed_many(self, passengers):
+        """
+        Push several bookings onto the confirmed stack at once, like _push_confirmed.
+        """
+        with self._stack_lock:
+            start = len(self._confirmed)
+            self._confirmed_slots.update(zip(
+                [(passenger[0], passenger[2]) for passenger in passengers], range(start, start + len(passengers))
+            ))
+            self._confirmed.extend(passengers)
+            self.reservation_columns.extend(passengers)
+            self.occupancy_version += 1
+
+    def _pop_confirmed(self, passenger_id, flight_number):
+        """
+        Remove a booking from the confirmed stack by leaving a tombstone in its slot.
+        Returns the removed booking, or None if there is no such booking.
+        """
+        with self._stack_lock:
+            slot = self._confirmed_slots.pop((passenger_id, flight_number), None)
+            if slot is None:
+                return None
+            passenger = self._confirmed[slot]
+            self._confirmed[slot] = None
+            self._tombstones += 1
+            self.reservation_columns.remove(passenger_id, flight_number)
+            self.occupancy_version += 1
+            if self._tombstones > self.COMPACTION_THRESHOLD and self._tombstones * 2 > len(self._confirmed):
+                self._compact_confirmed()
+            return passenger
+
+    def _build_passenger_index(self):
+        """
+        Build the passenger index from the confirmed stack and the waitlists.
+        """
+        self.passenger_index = {}
+        self.flight_bookings = {}
+        for passenger in self._confirmed:
+            self._index_passenger(passenger[0], passenger[2], "booked", passenger[4], passenger)
+        for (_, seat_class), queue in self.waitlists.items():
+            for passenger in queue:
+                self._index_passenger(passenger[0], passenger[2], "waitlisted", seat_class, passenger)
 
+    def _build_seat_inventory(self):
+        """
+        Build the per-flight, per-class seat inventory from the confirmed stack.
+        """
+        self.seat_inventory = {}
+        for passenger in self._confirmed:
+            inventory = self._get_seat_inventory(passenger[2], passenger[4])
+            if inventory:
+                inventory.reserve(passenger[3])
+
+    def _get_seat_inventory(self, flight_number, seat_class):
+        """
+        Return the seat inventory for a flight and class, creating it on first use.
+        Returns None if the flight does not exist.
+        """
+        inventory = self.seat_inventory.get((flight_number, seat_class))
+        if inventory is None:
+            flight_node = self.flights_graph.get_node(flight_number)
+            if not flight_node:
+                return None
+            seating_list = flight_node.data["seating_list"].get(seat_class, [])
+            inventory = SeatInventory(seating_list, seat_class)
+            self.seat_inventory[(flight_number, seat_class)] = inventory
+        return inventory
+
+    def _build_routes(self):
+        """
+        Build the route of every flight, from the first leg's departure to the last leg's arrival.
+        Flights without leg data fall back to the departure and arrival stored in the flights graph.
+        """
+        self.legs_by_flight = {}
+        for leg in self.flight_leg_data:
+            self.legs_by_flight.setdefault(leg.Flight_number, []).append(leg)
+        self.routes = {}
+        self.flights_by_route = {}
+        for flight_number in self.flights_graph.nodes:
+            self._set_route(flight_number)
+
+    def _set_route(self, flight_number):
+        """
+        (Re)compute the route of one flight from its legs, or drop it if the flight no longer exists.
+        """
+        old_route = self.routes.pop(flight_number, None)
+        if old_route is not None:
+            self.flights_by_route[old_route].remove(flight_number)
+            if not self.flights_by_route[old_route]:
+                del self.flights_by_route[old_route]
+        flight_node = self.flights_graph.get_node(flight_number)
+        if not flight_node:
+            return
+        flight_legs = self.legs_by_flight.get(flight_number)
+        if flight_legs:
+            route = flight_endpoints(flight_legs)
+        else:
+            route = (flight_node.data.get("departure", "Unknown"), flight_node.data.get("arrival", "Unknown"))
+        self.routes[flight_number] = route
+        self.flights_by_route.setdefault(route, []).append(flight_number)
+
+    def _index_passenger(self, passenger_id, flight_number, status, seat_class, record):
+        """
+        Record a booking or waitlist entry in the passenger index.
+        """
+        self.passenger_index.setdefault(passenger_id, {})[flight_number] = (status, seat_class, record)
+        self._bump_flight(flight_number)
+        if self.storage is not None:
+            self.storage.append(status, seat_class, *record)
+        if status == "booked":
+            self.flight_bookings.setdefault(flight_number, {})[passenger_id] = record
+
+    def _bump_flight(self, flight_number):
+        """
+        Mark the cached renderings of a flight as stale.
+        """
+        self.flight_versions[flight_number] = self.flight_versions.get(flight_number, 0) + 1
+
+    def _unindex_passenger(self, passenger_id, flight_number):
+        """
+        Drop a booking or waitlist entry from the passenger index.
+        """
+        entries = self.passenger_index.get(passenger_id)
+        if entries is None:
+            return
+        entry = entries.pop(flight_number, None)
+        if not entries:
+            del self.passenger_index[passenger_id]
+        self._bump_flight(flight_number)
+        if entry and self.storage is not None:
+            self.storage.append("removed", passenger_id, flight_number)
+        if entry and entry[0] == "booked":
+            self.flight_bookings[flight_number].pop(passenger_id, None)
+
+    @durable
     def book_passenger(self, passenger, flight_number, seat_class):
         """
         Attempt to book a passenger on a specific flight in a specific class.
@@ -34,8 +495,17 @@ class BookingManager:
         passenger_id = passenger[0]
 
         # Validate PassengerID format
-        if not re.match(r"^555-\d{4}$", passenger_id):
-            return "PassengerID must be in the format '555-xxxx' (e.g., 555-1234)."
+        if not PASSENGER_ID_PATTERN.match(passenger_id):
+            return INVALID_PASSENGER_ID_MESSAGE
+
+        with self._flight_lock(flight_number), self._passenger_lock(passenger_id):
+            return self._book_validated_passenger(passenger, flight_number, seat_class)
+
+    def _book_validated_passenger(self, passenger, flight_number, seat_class):
+        """
+        Book a passenger whose PassengerID has been validated. The caller holds the flight and passenger locks.
+        """
+        passenger_id = passenger[0]
 
         # Check if the PassengerID is already booked or waitlisted
         if self.is_passenger_id_exists(passenger_id):
@@ -54,11 +524,127 @@ class BookingManager:
         if seat_number == "No available seats in this class.":
             return self.add_to_waitlist(passenger, flight_number, seat_class)
 
-        confirmed_passenger = [passenger_id, passenger[1], flight_number, seat_number, seat_class]
-        self.confirmed_passengers_stack.append(confirmed_passenger)
+        self._get_seat_inventory(flight_number, seat_class).reserve(seat_number)
+        return self._confirm_booking(passenger, flight_number, seat_number, seat_class)
+
+    def _confirm_booking(self, passenger, flight_number, seat_number, seat_class):
+        """
+        Record a booking for a seat that has already been reserved in the seat inventory.
+        """
+        confirmed_passenger = Booking(passenger[0], passenger[1], flight_number, seat_number, seat_class)
+        self._push_confirmed(confirmed_passenger)
+        self._index_passenger(passenger[0], flight_number, "booked", seat_class, confirmed_passenger)
         return f"Passenger {passenger[1]} booked on flight {flight_number} with seat number {seat_number} in {seat_class} class."
-    
-    
+
+    @durable
+    def book_many(self, requests):
+        """
+        Book a batch of passengers in one pass.
+
+        Requests are validated together and grouped by flight and class, and the locks of every
+        flight and passenger involved are taken once. Each group reserves its seats in one allocation,
+        then confirms its bookings and waitlists its overflow in request order, each in one batch.
+        The whole call is written to the attached storage as a single "booked_many" record.
+
+        Args:
+        - requests: Iterable of (passenger, flight_number, seat_class) tuples, with passenger
+          given as [PassengerID, Passenger_name] like in book_passenger.
+
+        Returns:
+        - A list with the booking or waitlist status of each request, in request order.
+        """
+        requests = list(requests)
+        results = [None] * len(requests)
+        groups = {}  # (flight_number, seat_class) -> request indices in order
+        claimed = set()  # PassengerIDs requested earlier in this batch
+        match = PASSENGER_ID_PATTERN.match
+        for i, (passenger, flight_number, seat_class) in enumerate(requests):
+            passenger_id = passenger[0]
+            if not match(passenger_id):
+                results[i] = INVALID_PASSENGER_ID_MESSAGE
+            elif passenger_id in claimed:
+                results[i] = f"Passenger with ID {passenger_id} has already been booked on another flight."
+            else:
+                claimed.add(passenger_id)
+                groups.setdefault((flight_number, seat_class), []).append(i)
+
+        booked, waitlisted = [], []  # Records of the storage entry
+        # Like utils._records_from_columns, the cycle collector is paused while the batch allocates
+        # its bookings and index entries: they hold no cycles, and it would otherwise keep rescanning them.
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            # The locks are held until the storage record is appended, so it lands in order
+            with self._flights_lock({flight_number for flight_number, _ in groups}), self._passengers_lock(claimed):
+                for (flight_number, seat_class), indices in groups.items():
+                    passenger_ids = [requests[i][0][0] for i in indices]
+                    new_indices = indices
+                    if not self.passenger_index.keys().isdisjoint(passenger_ids):
+                        new_indices = []
+                        for i, passenger_id in zip(indices, passenger_ids):
+                            if passenger_id in self.passenger_index:
+                                results[i] = f"Passenger with ID {passenger_id} has already been booked on another flight."
+                            else:
+                                new_indices.append(i)
+                    inventory = self._get_seat_inventory(flight_number, seat_class)
+                    seat_numbers = inventory.allocate(len(new_indices)) if inventory else []
+                    booked.extend(self._confirm_bookings(
+                        requests, new_indices[:len(seat_numbers)], flight_number, seat_numbers, seat_class, results
+                    ))
+                    waitlisted.extend(self._waitlist_many(
+                        requests, new_indices[len(seat_numbers):], flight_number, seat_class, results
+                    ))
+                if self.storage is not None and (booked or waitlisted):
+                    self.storage.append("booked_many", booked, waitlisted)
+        finally:
+            if collecting:
+                gc.enable()
+        return results
+
+    def _confirm_bookings(self, requests, indices, flight_number, seat_numbers, seat_class, results):
+        """
+        Record the bookings of a book_many group, whose seats have already been allocated.
+        The caller holds the flight's lock and the passengers' locks.
+
+        Returns:
+        - The new bookings.
+        """
+        passengers = [requests[i][0] for i in indices]
+        bookings = list(map(partial(tuple.__new__, Booking), zip(
+            [passenger[0] for passenger in passengers], [passenger[1] for passenger in passengers],
+            repeat(flight_number), seat_numbers, repeat(seat_class)
+        )))
+        if not bookings:
+            return bookings
+        self.passenger_index.update({booking[0]: {flight_number: ("booked", seat_class, booking)} for booking in bookings})
+        self.flight_bookings.setdefault(flight_number, {}).update({booking[0]: booking for booking in bookings})
+        for i, booking in zip(indices, bookings):
+            results[i] = f"Passenger {booking[1]} booked on flight {flight_number} with seat number {booking[3]} in {seat_class} class."
+        self._push_confirmed_many(bookings)
+        self._bump_flight(flight_number)
+        return bookings
+
+    def _waitlist_many(self, requests, indices, flight_number, seat_class, results):
+        """
+        Waitlist the overflow of a book_many group in request order.
+        The caller holds the flight's lock and the passengers' locks.
+
+        Returns:
+        - The [seat_class, *entry] records of the new waitlist entries.
+        """
+        entries = list(map(partial(tuple.__new__, WaitlistEntry), zip(
+            [requests[i][0][0] for i in indices], [requests[i][0][1] for i in indices], repeat(flight_number)
+        )))
+        if not entries:
+            return []
+        self.passenger_index.update({entry[0]: {flight_number: ("waitlisted", seat_class, entry)} for entry in entries})
+        for i, entry in zip(indices, entries):
+            results[i] = f"OOPS! No seats available for selected class. Passenger {entry[1]} added to the waitlist for flight {flight_number} in {seat_class} class."
+        sequences = list(islice(self._waitlist_sequence, len(entries)))
+        self._get_waitlist_queue(flight_number, seat_class).extend(entries, sequences)
+        self._bump_flight(flight_number)
+        return [[seat_class, *entry] for entry in entries]
+
     def is_passenger_id_exists(self, passenger_id):
         """
         Check if a PassengerID exists in any confirmed bookings or waitlists.
@@ -69,19 +655,9 @@ class BookingManager:
         Returns:
         - True if the PassengerID exists, False otherwise.
         """
-        # Check confirmed passengers
-        for passenger in self.confirmed_passengers_stack:
-            if passenger[0] == passenger_id:
-                return True
-
-        # Check waitlisted passengers
-        for queue in self.waitlisted_passengers_queue.values():
-            for waitlisted_passenger in queue:
-                if waitlisted_passenger[0] == passenger_id:
-                    return True
-
-        return False
+        return passenger_id in self.passenger_index
 
+    @durable
     def cancel_booking(self, passenger_id, flight_number):
         """ 
         Cancel a booking and manage the graph.
@@ -93,23 +669,414 @@ class BookingManager:
         Returns:
         - A boolean indicating whether the booking was found and cancelled.
         """
-        found = False
-        temp_stack = []
-        while self.confirmed_passengers_stack:
-            passenger = self.confirmed_passengers_stack.pop()
-            if passenger[0] == passenger_id and passenger[2] == flight_number:
-                found = True
-                break
-            temp_stack.append(passenger)
-
-        while temp_stack:
-            self.confirmed_passengers_stack.append(temp_stack.pop())
-
-        if found:
-            # Manage the waitlist for the flight
-            self.manage_waitlist(flight_number)
+        with self._flight_lock(flight_number):
+            with self._passenger_lock(passenger_id):
+                passenger = self._pop_confirmed(passenger_id, flight_number)
+                found = passenger is not None
+                if found:
+                    self._unindex_passenger(passenger_id, flight_number)
+
+            if found:
+                inventory = self._get_seat_inventory(flight_number, passenger[4])
+                if inventory:
+                    inventory.release(passenger[3])
+                # Manage the waitlist for the flight
+                self.manage_waitlist(flight_number)
         return found
 
+    def find_alternative_flights(self, flight_number):
+        """
+        Find the other flights that fly the same route as a flight.
+
+        Args:
+        - flight_number: The flight to find alternatives for.
+
+        Returns:
+        - A list of flight numbers with the same origin and destination.
+        """
+        route = self.routes.get(flight_number)
+        if route is None or "Unknown" in route:
+            return []
+        return [other for other in self.flights_by_route.get(route, []) if other != flight_number]
+
+    @durable
+    def cancel_flight(self, flight_number, rebook_to=None):
+        """
+        Cancel every booking and waitlist entry on a flight, optionally re-accommodating the passengers.
+
+        Passengers are re-accommodated in their original class: confirmed passengers first, in booking
+        order, then waitlisted passengers, in waitlist order. Seats are filled on the alternative flights
+        in the order given; passengers that still do not fit are waitlisted on the first alternative.
+        Passengers already booked or waitlisted on one of the alternatives keep that entry and are not
+        re-accommodated again. The displaced passengers stay locked until re-accommodation is finished.
+
+        Args:
+        - flight_number: The flight to cancel.
+        - rebook_to: Optional list of alternative flight numbers. Flights that do not exist or do not
+          fly the same route are skipped (see find_alternative_flights).
+
+        Returns:
+        - A dictionary describing the outcome with the keys "cancelled" and "removed_from_waitlist"
+          (PassengerIDs), "rebooked" ((PassengerID, flight_number, seat_number, seat_class) tuples),
+          "waitlisted" ((PassengerID, flight_number, seat_class) tuples), "already_on_alternative"
+          ((PassengerID, flight_number) tuples), "unaccommodated" (PassengerIDs) and "skipped_flights"
+          (flight numbers).
+        """
+        with self._flights_lock([flight_number, *(rebook_to or [])]):
+            return self._cancel_flight(flight_number, rebook_to)
+
+    def _cancel_flight(self, flight_number, rebook_to):
+        """
+        Body of cancel_flight. The caller holds the locks of the flight and its alternatives.
+        """
+        report = {
+            "cancelled": [],
+            "removed_from_waitlist": [],
+            "rebooked": [],
+            "waitlisted": [],
+            "already_on_alternative": [],
+            "unaccommodated": [],
+            "skipped_flights": [],
+        }
+        bookings = list(self.flight_bookings.get(flight_number, {}).values())
+        queues = {
+            seat_class: list(self.waitlists.get((flight_number, seat_class)) or ())
+            for seat_class in self.seat_classes
+        }
+        passenger_ids = [passenger[0] for passenger in bookings]
+        passenger_ids += [passenger[0] for queue in queues.values() for passenger in queue]
+        # Keep the displaced passengers locked until they are re-accommodated, so that no other
+        # request can book them in between
+        with self._passengers_lock(passenger_ids):
+            self._displace_and_rebook(flight_number, rebook_to, bookings, queues, report)
+        return report
+
+    def _displace_and_rebook(self, flight_number, rebook_to, bookings, queues, report):
+        """
+        Drop the bookings and waitlist entries of a cancelled flight and re-accommodate the passengers.
+        The caller holds the locks of the flights and of the displaced passengers.
+        """
+        displaced = {}  # seat_class -> [passenger] in re-accommodation order
+        for passenger in bookings:
+            self._pop_confirmed(passenger[0], flight_number)
+            self._unindex_passenger(passenger[0], flight_number)
+            displaced.setdefault(passenger[4], []).append(passenger)
+            report["cancelled"].append(passenger[0])
+        for seat_class in self.seat_classes:
+            self.seat_inventory.pop((flight_number, seat_class), None)
+
+        for seat_class, queue in queues.items():
+            self.waitlists.pop((flight_number, seat_class), None)
+            for passenger in queue:
+                self._unindex_passenger(passenger[0], flight_number)
+                displaced.setdefault(seat_class, []).append(passenger)
+                report["removed_from_waitlist"].append(passenger[0])
+
+        # Only flights on the same known route qualify, as in find_alternative_flights
+        alternatives = []
+        equivalent = set(self.find_alternative_flights(flight_number))
+        for other in rebook_to or []:
+            if other in equivalent:
+                alternatives.append(other)
+            else:
+                report["skipped_flights"].append(other)
+
+        for seat_class, passengers in displaced.items():
+            remaining = []
+            for passenger in passengers:
+                held = next(
+                    (other for other in alternatives if self.is_passenger_booked_or_waitlisted(passenger[0], other)),
+                    None
+                )
+                if held is None:
+                    remaining.append(passenger)
+                else:
+                    report["already_on_alternative"].append((passenger[0], held))
+            passengers = remaining
+            for other in alternatives:
+                if not passengers:
+                    break
+                inventory = self._get_seat_inventory(other, seat_class)
+                seat_numbers = inventory.allocate(len(passengers))
+                for passenger, seat_number in zip(passengers, seat_numbers):
+                    self._confirm_booking(passenger, other, seat_number, seat_class)
+                    report["rebooked"].append((passenger[0], other, seat_number, seat_class))
+                passengers = passengers[len(seat_numbers):]
+            for passenger in passengers:
+                if alternatives:
+                    self.add_to_waitlist(passenger, alternatives[0], seat_class)
+                    report["waitlisted"].append((passenger[0], alternatives[0], seat_class))
+                else:
+                    report["unaccommodated"].append(passenger[0])
+
+    @durable
+    def upsert_flight(self, flight_number, departure, arrival, weekdays, seating_list):
+        """
+        Add a flight, or update the details of an existing one while keeping its bookings and seats.
+
+        Args:
+        - flight_number: The flight to add or update.
+        - departure: Departure airport code.
+        - arrival: Arrival airport code.
+        - weekdays: Whether the flight operates on weekdays.
+        - seating_list: Seat numbers by class, only used when the flight is new.
+        """
+        with self._flight_lock(flight_number):
+            with self._stack_lock:
+                flight_node = self.flights_graph.get_node(flight_number)
+                if flight_node is None:
+                    self.flights_graph.add_node(flight_number, {
+                        "departure": departure,
+                        "arrival": arrival,
+                        "weekdays": weekdays,
+                        "seating_list": seating_list
+                    })
+                    self.flight_entries[flight_number] = [flight_number, departure, arrival, weekdays, seating_list]
+                    self.flights_stack.append(self.flight_entries[flight_number])
+                    self.occupancy_version += 1
+                else:
+                    flight_node.data.update(departure=departure, arrival=arrival, weekdays=weekdays)
+                    flight = self.flight_entries.get(flight_number)
+                    if flight:
+                        flight[1:4] = [departure, arrival, weekdays]
+                    self.flights_table.delete(flight_number)
+                self.flights_table.insert([flight_number, departure, arrival, weekdays])
+                self._bump_flight(flight_number)
+                if self.storage is not None:
+                    stored_seating = flight_node.data.get("seating_list") if flight_node else seating_list
+                    self.storage.append("flight", flight_number, departure, arrival, weekdays, stored_seating)
+            self._set_route(flight_number)
+
+    @durable
+    def remove_flight(self, flight_number, rebook_to=None):
+        """
+        Cancel a flight (see cancel_flight) and remove it from the flights graph, table and stack.
+
+        Returns:
+        - The cancel_flight report.
+        """
+        report = self.cancel_flight(flight_number, rebook_to)
+        self._drop_flight(flight_number)
+        return report
+
+    def _drop_flight(self, flight_number):
+        """
+        Remove a flight from the flights graph, table and stack, leaving its bookings alone.
+        """
+        with self._flight_lock(flight_number):
+            with self._stack_lock:
+                self.flights_graph.remove_node(flight_number)
+                self.flights_table.delete(flight_number)
+                flight = self.flight_entries.pop(flight_number, None)
+                if flight is not None:
+                    self.flights_stack.remove(flight)
+                    self.occupancy_version += 1
+                self._bump_flight(flight_number)
+                if self.storage is not None:
+                    self.storage.append("flight_removed", flight_number)
+            self._set_route(flight_number)
+
+    def update_flight_legs(self, added, removed):
+        """
+        Apply added and removed flight legs, updating the routes of the flights they belong to.
+
+        Returns:
+        - The set of affected flight numbers.
+        """
+        flight_numbers = {leg.Flight_number for leg in [*added, *removed]}
+        with self._flights_lock(flight_numbers):
+            if not isinstance(self.flight_leg_data, list):
+                self.flight_leg_data = list(self.flight_leg_data)
+            for leg in removed:
+                _remove_value(self.flight_leg_data, leg)
+                _remove_value(self.legs_by_flight.get(leg.Flight_number, []), leg)
+            for leg in added:
+                self.flight_leg_data.append(leg)
+                self.legs_by_flight.setdefault(leg.Flight_number, []).append(leg)
+            for flight_number in flight_numbers:
+                self._set_route(flight_number)
+                self._bump_flight(flight_number)
+        return flight_numbers
+
+    def update_leg_instances(self, added, removed):
+        """
+        Apply added and removed leg instances.
+        """
+        with self._flights_lock({leg.Flight_number for leg in [*added, *removed]}):
+            if not isinstance(self.leg_instance_data, list):
+                self.leg_instance_data = list(self.leg_instance_data)
+            for leg in removed:
+                _remove_value(self.leg_instance_data, leg)
+                self.leg_instances.remove(leg)
+            self.leg_instance_data.extend(added)
+            for leg in added:
+                self.leg_instances.add(leg)
+            for leg in [*added, *removed]:
+                self._bump_flight(leg.Flight_number)
+
+    @durable
+    def add_booking(self, booking):
+        """
+        Add a booking that already has its seat (e.g., a reservation added to the DB file).
+
+        Args:
+        - booking: Booking record or [PassengerID, Passenger_name, flight_number, seat_number, seat_class].
+
+        Returns:
+        - True if the booking was added, False if the passenger is already on that flight.
+        """
+        passenger_id, _, flight_number, seat_number, seat_class = booking
+        with self._flight_lock(flight_number):
+            with self._passenger_lock(passenger_id):
+                if self.is_passenger_booked_or_waitlisted(passenger_id, flight_number):
+                    return False
+                self._push_confirmed(booking)
+                self._index_passenger(passenger_id, flight_number, "booked", seat_class, booking)
+            inventory = self._get_seat_inventory(flight_number, seat_class)
+            if inventory:
+                inventory.reserve(seat_number)
+        return True
+
+    @durable
+    def change_booking(self, booking):
+        """
+        Move a passenger's booking to another seat or class of the same flight (e.g., a reservation
+        edited in the DB file). The booking keeps its place on the flight, so the old seat is released
+        without promoting anyone from the waitlist.
+
+        Args:
+        - booking: The new Booking record or [PassengerID, Passenger_name, flight_number, seat_number, seat_class].
+
+        Returns:
+        - True if the booking was changed, False if the passenger has no booking on that flight.
+        """
+        passenger_id, _, flight_number, seat_number, seat_class = booking
+        with self._flight_lock(flight_number):
+            with self._passenger_lock(passenger_id):
+                old_booking = self._pop_confirmed(passenger_id, flight_number)
+                if old_booking is None:
+                    return False
+                self._unindex_passenger(passenger_id, flight_number)
+                self._push_confirmed(booking)
+                self._index_passenger(passenger_id, flight_number, "booked", seat_class, booking)
+            inventory = self._get_seat_inventory(flight_number, old_booking[4])
+            if inventory:
+                inventory.release(old_booking[3])
+            inventory = self._get_seat_inventory(flight_number, seat_class)
+            if inventory:
+                inventory.reserve(seat_number)
+        return True
+
+    def attach_storage(self, storage):
+        """
+        Restore the bookings kept in a storage backend, then record every further change in it.
+
+        Args:
+        - storage: A Journal (journal.py) or SQLiteStorage (storage.py). Its checkpoint, if any, replaces
+          the current flights, bookings and waitlists, and its records are then replayed in order. Empty
+          storage is seeded with the current state.
+        """
+        with storage.transaction(), self._flights_lock():
+            if storage.checkpoint_state is not None:
+                self._restore_state(storage.checkpoint_state)
+            for record in storage.records:
+                self._replay(record["event"], record["args"])
+            self.storage = storage
+            if storage.checkpoint_state is None and not storage.records:
+                self.checkpoint()
+
+    def _replay(self, event, args):
+        """
+        Apply one storage record (see _index_passenger, _unindex_passenger, book_many, sort_waitlist,
+        upsert_flight and remove_flight).
+        """
+        if event == "booked":
+            self.add_booking(Booking(*args[1:]))
+        elif event == "waitlisted":
+            seat_class, entry = args[0], WaitlistEntry(*args[1:])
+            self._get_waitlist_queue(entry[2], seat_class).append(entry, next(self._waitlist_sequence))
+            self._index_passenger(entry[0], entry[2], "waitlisted", seat_class, entry)
+        elif event == "booked_many":
+            booked, waitlisted = args
+            for booking in booked:
+                self._replay("booked", [booking[4], *booking])
+            for entry in waitlisted:
+                self._replay("waitlisted", entry)
+        elif event == "removed":
+            passenger_id, flight_number = args
+            entry = self.passenger_index.get(passenger_id, {}).get(flight_number)
+            if entry is None:
+                return
+            status, seat_class, record = entry
+            if status == "booked":
+                self._pop_confirmed(passenger_id, flight_number)
+                inventory = self._get_seat_inventory(flight_number, seat_class)
+                if inventory:
+                    inventory.release(record[3])
+            else:
+                self.waitlists[(flight_number, seat_class)].remove(record)
+            self._unindex_passenger(passenger_id, flight_number)
+        elif event == "flight":
+            self.upsert_flight(*args)
+        elif event == "flight_removed":
+            self._drop_flight(args[0])
+        elif event == "reordered":
+            flight_number, seat_class, passenger_ids = args
+            queue = self.waitlists.get((flight_number, seat_class))
+            if queue:
+                queue.reorder([self.passenger_index[passenger_id][flight_number][2] for passenger_id in passenger_ids])
+
+    def export_state(self):
+        """
+        Return the bookings and waitlists as JSON-serializable data.
+
+        Returns:
+        - A dictionary with "bookings" (booking lists in booking order), "waitlists"
+          ([seat_class, PassengerID, Passenger_name, flight_number] lists in arrival order) and "flights"
+          (flights_stack entries).
+        """
+        with self._flights_lock():
+            waitlisted = sorted(
+                (sequence, seat_class, list(entry))
+                for (_, seat_class), queue in self.waitlists.items()
+                for sequence, entry in queue.items()
+            )
+            return {
+                "bookings": [list(booking) for booking in self.confirmed_passengers_stack],
+                "waitlists": [[seat_class, *entry] for _, seat_class, entry in waitlisted],
+                "flights": [list(flight) for flight in self.flights_stack],
+            }
+
+    def _restore_state(self, state):
+        """
+        Replace the flights, bookings and waitlists with state returned by export_state.
+        Flights missing from the state are dropped and the others are added or updated, so flight
+        changes made before the checkpoint (e.g., airports entered in the app) survive a restart.
+        """
+        flights = state.get("flights")
+        if flights is not None:
+            stored = {flight[0] for flight in flights}
+            for flight_number in [flight[0] for flight in self.flights_stack if flight[0] not in stored]:
+                self._drop_flight(flight_number)
+            for flight_number, departure, arrival, weekdays, seating_list in flights:
+                self.upsert_flight(flight_number, departure, arrival, weekdays, seating_list)
+        self.confirmed_passengers_stack = [Booking(*booking) for booking in state["bookings"]]
+        self.waitlists = {}
+        for seat_class, *entry in state["waitlists"]:
+            entry = WaitlistEntry(*entry)
+            self._get_waitlist_queue(entry[2], seat_class).append(entry, next(self._waitlist_sequence))
+        self._build_passenger_index()
+        self._build_seat_inventory()
+        self.render_cache.clear()
+
+    def checkpoint(self):
+        """
+        Store a checkpoint of the bookings in the storage, so the next start only replays later records.
+        """
+        with self.storage.transaction(), self._flights_lock():
+            self.storage.checkpoint(self.export_state())
+
+    @durable
     def manage_waitlist(self, flight_number):
         """
         Manage the waitlist for a specific flight.
@@ -120,83 +1087,157 @@ class BookingManager:
         Returns:
         - A list of strings indicating the booking status of waitlisted passengers.
         """
-        messages = []
-        for seat_class, queue in self.waitlisted_passengers_queue.items():
-            temp_queue = deque()
-            while queue:
-                passenger = queue.popleft()
-                if passenger[2] == flight_number:
-                    if self.is_seat_number_available(flight_number, seat_class):
+        with self._flight_lock(flight_number):
+            messages = []
+            for seat_class in self.seat_classes:
+                queue = self.waitlists.get((flight_number, seat_class))
+                while queue and self.is_seat_number_available(flight_number, seat_class):
+                    passenger = queue.popleft()
+                    with self._passenger_lock(passenger[0]):
+                        self._unindex_passenger(passenger[0], flight_number)
                         self.book_passenger(passenger, flight_number, seat_class)
-                        messages.append(f"Waitlisted passenger {passenger[1]} booked on flight {flight_number} in {seat_class} class.")
-                    else:
-                        temp_queue.append(passenger)
-                else:
-                    temp_queue.append(passenger)
-            self.waitlisted_passengers_queue[seat_class] = temp_queue
-        return messages
+                    messages.append(f"Waitlisted passenger {passenger[1]} booked on flight {flight_number} in {seat_class} class.")
+            return messages
 
-    def get_flight_info(self, flight_number):
+    def get_flight_info(self, flight_number, date=None):
         """
-        Retrieve detailed information about a flight.
+        Retrieve detailed information about a flight, with every leg instance on record.
+        The report is cached until the flight changes (see render_cache and flight_versions).
 
         Args:
         - flight_number: The flight number to retrieve information for.
+        - date: If given, only include the leg instances on this date (a datetime.date).
 
         Returns:
         - A string containing the flight's information or an error message if not found.
         """
+        return self.render_cache.get(
+            ("info", flight_number, date),
+            self.flight_versions.get(flight_number, 0),
+            lambda: self._render_flight_info(flight_number, date)
+        )
+
+    def _render_flight_info(self, flight_number, date):
         # Retrieve flight data
         flight_node = self.flights_graph.get_node(flight_number)
-        if flight_node:
-            flight_data = flight_node.data
-
-            # Retrieve leg instance data for departure and arrival codes
-            leg_instance = next(
-                (leg for leg in self.leg_instance_data
-                if leg["Flight_number"] == flight_number),
-                None
-            )
-            if leg_instance:
-                departure_code = leg_instance.get("Departure_airport_code", "Unknown")
-                arrival_code = leg_instance.get("Arrival_airport_code", "Unknown")
-                number_of_available_seats = leg_instance.get("Number_of_available_seats", "Unknown")
-                date = leg_instance.get("Date", "Unknown")
-                departure_time = leg_instance.get("Departure_time", "Unknown")
-                arrival_time = leg_instance.get("Arrival_time", "Unknown")
-            else:
-                departure_code = "Unknown"
-                arrival_code = "Unknown"
-                number_of_available_seats = "Unknown"
-                date = "Unknown"
-                departure_time = "Unknown"
-                arrival_time = "Unknown"
-
-            # Retrieve airport details from airport_data
-            departure_airport = self.airport_data.get(departure_code, {})
-            arrival_airport = self.airport_data.get(arrival_code, {})
-
-            airline = self.flight_data.get(flight_number, {}).get("Airline", "Unknown")
-            info_lines = [
-                f"Flight Number: {flight_number}",
-                f"Airline: {airline}",
-                f"Departure Airport: {departure_airport.get('Name', departure_code)} ({departure_code})",
-                f"Arrival Airport: {arrival_airport.get('Name', arrival_code)} ({arrival_code})",
-                f"Weekdays: {flight_data.get('weekdays', 'Unknown')}",
-                f"Date: {date}",
-                f"Departure Time: {departure_time}",
-                f"Arrival Time: {arrival_time}",
-                f"Number of Available Seats: {number_of_available_seats}",
-                "Seating Information:"
+        if not flight_node:
+            return f"Flight {flight_number} not found."
+        flight_data = flight_node.data
+        origin, destination = self.routes.get(flight_number, ("Unknown", "Unknown"))
+
+        airline = _field(self.flight_data.get(flight_number), "Airline")
+        info_lines = [
+            f"Flight Number: {flight_number}",
+            f"Airline: {airline}",
+            f"Departure Airport: {self._airport_label(origin)}",
+            f"Arrival Airport: {self._airport_label(destination)}",
+            f"Weekdays: {flight_data.get('weekdays', 'Unknown')}",
+        ]
+
+        # Leg instances come from the index, ordered by date and leg number
+        leg_instances = self.leg_instances.for_flight(flight_number, date)
+        if not leg_instances:
+            info_lines.append(f"Date: {date or 'Unknown'}")
+        for leg_instance in leg_instances:
+            info_lines += [
+                f"Leg {_field(leg_instance, 'Leg_number')} on {_field(leg_instance, 'Date')}: "
+                f"{self._airport_label(_field(leg_instance, 'Departure_airport_code'))} -> "
+                f"{self._airport_label(_field(leg_instance, 'Arrival_airport_code'))}",
+                f"  Departure Time: {format_time(_field(leg_instance, 'Departure_time'))}",
+                f"  Arrival Time: {format_time(_field(leg_instance, 'Arrival_time'))}",
+                f"  Number of Available Seats: {_field(leg_instance, 'Number_of_available_seats')}",
             ]
-            for passenger in self.confirmed_passengers_stack:
-                # Ensure the passenger data structure is valid
-                if len(passenger) >= 5 and passenger[2] == flight_number:
-                    info_lines.append(
-                        f"Seat: {passenger[3]}, Passenger: {passenger[1]}, PassengerID: {passenger[0]}, Class: {passenger[4]}"
-                    )
-            return "\n".join(info_lines)
-        return f"Flight {flight_number} not found."
+
+        info_lines.append("Seating Information:")
+        with self._flight_lock(flight_number):
+            bookings = list(self.flight_bookings.get(flight_number, {}).values())
+        for passenger in bookings:
+            info_lines.append(
+                f"Seat: {passenger[3]}, Passenger: {passenger[1]}, PassengerID: {passenger[0]}, Class: {passenger[4]}"
+            )
+        return "\n".join(info_lines)
+
+    def get_flight_row(self, flight_number):
+        """
+        Get the Available Flights page row of a flight, cached until the flight changes.
+
+        Args:
+        - flight_number: The flight number.
+
+        Returns:
+        - A dictionary with the flight's number, airports, weekdays, booked seats by class and
+          number of available seats, or None if the flight does not exist. Callers must not modify it.
+        """
+        return self.render_cache.get(
+            ("row", flight_number),
+            self.flight_versions.get(flight_number, 0),
+            lambda: self._render_flight_row(flight_number)
+        )
+
+    def _render_flight_row(self, flight_number):
+        flight = self.flight_entries.get(flight_number)
+        if flight is None:
+            return None
+        _, departure, arrival, weekdays, _ = flight
+        booked_seats, available_seats = self.seat_counts(flight_number)
+        return {
+            "Flight Number": flight_number,
+            "Departure": self._airport_label(departure),
+            "Arrival": self._airport_label(arrival),
+            "Weekdays": weekdays,
+            "Booked Seats": booked_seats,
+            "Available Seats": sum(available_seats.values())
+        }
+
+    def _airport_label(self, airport_code):
+        """
+        Format an airport as "Name (code)", falling back to the code when the airport is not in the DB.
+        """
+        return f"{_field(self.airport_data.get(airport_code), 'Name', airport_code)} ({airport_code})"
+
+    def occupancy(self):
+        """
+        Get the booked seats, available seats and load factor of every flight by class at once.
+        They are counted in one pass over the columnar copy of the bookings (see ReservationColumns),
+        and cached until a booking or a flight changes.
+
+        Returns:
+        - A dictionary mapping each flight number to {seat_class: (booked, available, load factor)}.
+          Callers must not modify it.
+        """
+        with self._stack_lock:
+            return self.render_cache.get(("occupancy",), self.occupancy_version, self._count_occupancy)
+
+    def _count_occupancy(self):
+        capacities = {
+            flight_number: {seat_class: len(seats) for seat_class, seats in node.data["seating_list"].items()}
+            for flight_number, node in self.flights_graph.nodes.items()
+        }
+        return self.reservation_columns.occupancy(capacities)
+
+    def seat_counts(self, flight_number):
+        """
+        Get the booked and available seats of a flight by class.
+        The counts come from the seat inventories, which every booking, cancellation and rebooking
+        keeps up to date, so no booking has to be visited.
+
+        Args:
+        - flight_number: The flight number.
+
+        Returns:
+        - Two dictionaries mapping each class of the flight's seating list to its booked and its
+          available seats. Both are empty if the flight does not exist.
+        """
+        flight_node = self.flights_graph.get_node(flight_number)
+        if not flight_node:
+            return {}, {}
+        booked, available = {}, {}
+        with self._flight_lock(flight_number):
+            for seat_class, seats in flight_node.data["seating_list"].items():
+                inventory = self.seat_inventory.get((flight_number, seat_class))
+                booked[seat_class] = inventory.booked if inventory else 0
+                available[seat_class] = len(seats) - booked[seat_class]
+        return booked, available
 
     def is_seat_number_available(self, flight_number, seat_class):
         """
@@ -209,16 +1250,11 @@ class BookingManager:
         Returns:
         - A boolean indicating whether there is available space in the class.
         """
-        flight_node = self.flights_graph.get_node(flight_number)
-        if not flight_node:
-            return False
-
-        seating_list = flight_node.data["seating_list"].get(seat_class, [])
-        occupied_seats = [
-            passenger[3] for passenger in self.confirmed_passengers_stack
-            if passenger[2] == flight_number and passenger[4] == seat_class
-        ]
-        return len(occupied_seats) < len(seating_list)
+        with self._flight_lock(flight_number):
+            inventory = self._get_seat_inventory(flight_number, seat_class)
+            if not inventory:
+                return False
+            return inventory.is_available()
 
     def generate_seat_number(self, flight_number, seat_class):
         """
@@ -231,41 +1267,39 @@ class BookingManager:
         Returns:
         - The next available seat number as a string, or a message if no seats are available.
         """
-        flight_node = self.flights_graph.get_node(flight_number)
-        if not flight_node:
-            return None
+        with self._flight_lock(flight_number):
+            inventory = self._get_seat_inventory(flight_number, seat_class)
+            if not inventory:
+                return None
 
-        seating_list = flight_node.data["seating_list"].get(seat_class, [])
-        occupied_seats = [
-            passenger[3] for passenger in self.confirmed_passengers_stack
-            if passenger[2] == flight_number and passenger[4] == seat_class
-        ]
-
-        for seat in seating_list:
-            seat_number = f"{seat}{seat_class[0]}" 
-            if seat_number not in occupied_seats:
+            seat_number = inventory.next_free_seat()
+            if seat_number:
                 return seat_number
 
-        return "No available seats in this class."
+            return "No available seats in this class."
 
     def get_passenger_status(self, passenger_id):
         """
         Get the status of a passenger.
 
         Args:
-        - passenger_id: The ID of the passenger (Customer_phone).
+        - passenger_id: The ID of the passenger (PassengerID).
 
         Returns:
         - A string containing the passenger's status.
         """
-        for passenger in self.confirmed_passengers_stack:
-            if passenger[0] == passenger_id:
+        with self._passenger_lock(passenger_id):
+            entries = list(self.passenger_index.get(passenger_id, {}).values())
+        for status, seat_class, passenger in entries:
+            if status == "booked":
                 return f"Passenger {passenger[1]} is booked on flight {passenger[2]} with seat {passenger[3]} in {passenger[4]} class."
 
-        for seat_class, queue in self.waitlisted_passengers_queue.items():
-            for position, passenger in enumerate(queue):
-                if passenger[0] == passenger_id:
-                    return f"Passenger {passenger[1]} is waitlisted for flight {passenger[2]} in {seat_class} class at position {position + 1}."
+        for status, seat_class, passenger in entries:
+            with self._flight_lock(passenger[2]):
+                queue = self.waitlists.get((passenger[2], seat_class))
+                position = queue.position(passenger) if queue else None
+            if position:
+                return f"Passenger {passenger[1]} is waitlisted for flight {passenger[2]} in {seat_class} class at position {position}."
 
         return f"Passenger {passenger_id} has no bookings or waitlists."
     
@@ -275,26 +1309,16 @@ class BookingManager:
         Check if a passenger is already booked or waitlisted for a specific flight.
 
         Args:
-        - passenger_id: The ID of the passenger (Customer_phone).
+        - passenger_id: The ID of the passenger (PassengerID).
         - flight_number: The flight number to check.
 
         Returns:
         - True if the passenger is booked or waitlisted for the flight, False otherwise.
         """
-        # Check if the passenger is already booked
-        for passenger in self.confirmed_passengers_stack:
-            if passenger[0] == passenger_id and passenger[2] == flight_number:
-                return True
-
-        # Check if the passenger is waitlisted
-        for seat_class, queue in self.waitlisted_passengers_queue.items():
-            for waitlisted_passenger in queue:
-                if waitlisted_passenger[0] == passenger_id and waitlisted_passenger[2] == flight_number:
-                    return True
-
-        return False
+        return flight_number in self.passenger_index.get(passenger_id, {})
     
 
+    @durable
     def add_to_waitlist(self, passenger, flight_number, seat_class):
         """
         Add a passenger to the waitlist for a specific flight and class.
@@ -308,14 +1332,24 @@ class BookingManager:
         - A string indicating the waitlist status.
         """
         passenger_id = passenger[0]
+        with self._flight_lock(flight_number), self._passenger_lock(passenger_id):
+            return self._add_to_waitlist(passenger, flight_number, seat_class)
+
+    def _add_to_waitlist(self, passenger, flight_number, seat_class):
+        """
+        Body of add_to_waitlist. The caller holds the flight and passenger locks.
+        """
+        passenger_id = passenger[0]
 
         # Check if the PassengerID is already waitlisted for the same flight and class
-        for waitlisted_passenger in self.waitlisted_passengers_queue[seat_class]:
-            if waitlisted_passenger[0] == passenger_id and waitlisted_passenger[2] == flight_number:
-                return f"Passenger with ID {passenger_id} is already waitlisted for flight {flight_number} in {seat_class} class."
+        entry = self.passenger_index.get(passenger_id, {}).get(flight_number)
+        if entry and entry[0] == "waitlisted" and entry[1] == seat_class:
+            return f"Passenger with ID {passenger_id} is already waitlisted for flight {flight_number} in {seat_class} class."
 
         # Add the passenger to the waitlist
-        self.waitlisted_passengers_queue[seat_class].append([passenger_id, passenger[1], flight_number])
+        waitlisted_passenger = WaitlistEntry(passenger_id, passenger[1], flight_number)
+        self._get_waitlist_queue(flight_number, seat_class).append(waitlisted_passenger, next(self._waitlist_sequence))
+        self._index_passenger(passenger_id, flight_number, "waitlisted", seat_class, waitlisted_passenger)
         return f"OOPS! No seats available for selected class. Passenger {passenger[1]} added to the waitlist for flight {flight_number} in {seat_class} class."
     
 
@@ -329,14 +1363,17 @@ class BookingManager:
         Returns:
         - A dictionary containing the waitlist for each class, including passenger positions.
         """
-        waitlist = {}
-        for seat_class, queue in self.waitlisted_passengers_queue.items():
-            waitlist[seat_class] = [
-                {"position": idx + 1, "passenger_id": passenger[0], "passenger_name": passenger[1]}
-                for idx, passenger in enumerate(queue) if passenger[2] == flight_number
-            ]
-        return waitlist
+        with self._flight_lock(flight_number):
+            waitlist = {}
+            for seat_class in self.seat_classes:
+                queue = self.waitlists.get((flight_number, seat_class), ())
+                waitlist[seat_class] = [
+                    {"position": idx + 1, "passenger_id": passenger[0], "passenger_name": passenger[1]}
+                    for idx, passenger in enumerate(queue)
+                ]
+            return waitlist
     
+    @durable
     def remove_from_waitlist(self, passenger_id, flight_number, seat_class):
         """
         Remove a passenger from the waitlist.
@@ -349,12 +1386,13 @@ class BookingManager:
         Returns:
         - A string indicating the removal status.
         """
-        queue = self.waitlisted_passengers_queue[seat_class]
-        for passenger in queue:
-            if passenger[0] == passenger_id and passenger[2] == flight_number:
-                queue.remove(passenger)
+        with self._flight_lock(flight_number), self._passenger_lock(passenger_id):
+            entry = self.passenger_index.get(passenger_id, {}).get(flight_number)
+            if entry and entry[0] == "waitlisted" and entry[1] == seat_class:
+                self.waitlists[(flight_number, seat_class)].remove(entry[2])
+                self._unindex_passenger(passenger_id, flight_number)
                 return f"Passenger {passenger_id} removed from the waitlist for flight {flight_number} in {seat_class} class."
-        return f"Passenger {passenger_id} not found on the waitlist for flight {flight_number} in {seat_class} class."
+            return f"Passenger {passenger_id} not found on the waitlist for flight {flight_number} in {seat_class} class."
     
 
     def sort_confirmed_passengers(self, sort_by="Passenger Name"):
@@ -363,11 +1401,13 @@ class BookingManager:
         Args:
         - sort_by: The attribute to sort by (e.g., "Passenger Name", "Seat Class").
         """
-        if sort_by == "Passenger Name":
-            self.confirmed_passengers_stack = merge_sort(self.confirmed_passengers_stack, key=lambda x: x[1])  # Use Merge Sort
-        elif sort_by == "Seat Class":
-            self.confirmed_passengers_stack = quick_sort(self.confirmed_passengers_stack, key=lambda x: x[4])  # Use Quick Sort
+        with self._stack_lock:
+            if sort_by == "Passenger Name":
+                self.confirmed_passengers_stack = merge_sort(self.confirmed_passengers_stack, key=lambda x: x[1])  # Use Merge Sort
+            elif sort_by == "Seat Class":
+                self.confirmed_passengers_stack = merge_sort(self.confirmed_passengers_stack, key=lambda x: x[4])  # Stable, keeping booking order
 
+    @durable
     def sort_waitlist(self, flight_number, sort_by="Passenger Name"):
         """
         Sort the waitlist for a specific flight by a given attribute.
@@ -375,10 +1415,18 @@ class BookingManager:
         - flight_number: The flight number to sort the waitlist for.
         - sort_by: The attribute to sort by (e.g., "Passenger Name").
         """
-        for seat_class, queue in self.waitlisted_passengers_queue.items():
-            waitlist = [p for p in queue if p[2] == flight_number]
-            if sort_by == "Passenger Name":
-                sorted_waitlist = merge_sort(waitlist, key=lambda x: x[1])  # Use Merge Sort
-            elif sort_by == "Position":
-                sorted_waitlist = quick_sort(waitlist, key=lambda x: queue.index(x))  # Use Quick Sort
-            self.waitlisted_passengers_queue[seat_class] = deque(sorted_waitlist)
+        with self._flight_lock(flight_number):
+            for seat_class in self.seat_classes:
+                queue = self.waitlists.get((flight_number, seat_class))
+                if not queue:
+                    continue
+                entries = list(queue.items())
+                if sort_by == "Passenger Name":
+                    sorted_entries = merge_sort(entries, key=lambda x: x[1][1])  # Use Merge Sort
+                elif sort_by == "Position":
+                    sorted_entries = quick_sort(entries, key=lambda x: x[0])  # Use Quick Sort
+                else:
+                    continue
+                queue.reorder([passenger for _, passenger in sorted_entries])
+                if self.storage is not None:
+                    self.storage.append("reordered", flight_number, seat_class, [passenger[0] for passenger in queue])
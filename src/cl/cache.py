@@ -0,0 +1,46 @@
+class VersionedCache:
+    def __init__(self):
+        """
+        Cache of rendered values, each stored with the version of the data it was rendered from.
+        A lookup with a newer version re-renders and replaces the entry, so stale values are never
+        returned and there is at most one entry per key.
+        """
+        self.entries = {}  # key -> (version, value)
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, version, render):
+        """
+        Return the cached value of key if it was rendered at version, otherwise render and cache it.
+
+        Args:
+        - key: The cache key (e.g., ("info", flight_number)).
+        - version: The current version of the data behind key.
+        - render: Function returning the value for the current version.
+
+        Returns:
+        - The cached or freshly rendered value.
+        """
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        value = render()
+        self.entries[key] = (version, value)
+        return value
+
+    def clear(self):
+        """
+        Drop every entry, e.g. when data shared by all keys (such as airport names) changes.
+        """
+        self.entries = {}
+
+    def stats(self):
+        """
+        Return the hit and miss counters as a dictionary.
+        """
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries)}
@@ -0,0 +1,180 @@
+from array import array
+from itertools import islice
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, counts fall back to a single pure Python pass
+    np = None
+
+
+class ReservationColumns:
+    # Cancelled rows after which the columns may be compacted
+    COMPACTION_THRESHOLD = 1024
+
+    def __init__(self, bookings=(), seat_classes=("First", "Business", "Economy")):
+        """
+        Column-oriented copy of the confirmed bookings, for aggregations over every flight at once.
+        Flight numbers, classes, seat numbers and passenger IDs are interned into integer ids and
+        stored as one array("I") column each, which NumPy reads without copying.
+        Bookings are appended as they are made. Cancelled ones are cleared in a live column and
+        dropped once they outnumber the live ones.
+        Args:
+        - bookings: Booking records or [passenger_id, passenger_name, flight_number, seat_number, seat_class] lists.
+        - seat_classes: The seat classes to report, in order. Classes found in bookings are added after them.
+        """
+        self.flights, self.flight_ids = [], {}
+        self.seat_classes, self.class_codes = [], {}
+        self.seats, self.seat_ids = [], {}
+        self.passengers, self.passenger_ids = [], {}
+        for seat_class in seat_classes:
+            self._intern(self.seat_classes, self.class_codes, seat_class)
+        self._reset()
+        for booking in bookings:
+            self.add(booking)
+
+    def _reset(self):
+        self.flight_column, self.class_column = array("I"), array("I")
+        self.seat_column, self.passenger_column = array("I"), array("I")
+        self.live = array("B")  # 1 for confirmed rows, 0 for cancelled ones
+        self.rows = {}  # (passenger_id, flight_number) -> row
+        self.cancelled = 0
+
+    @staticmethod
+    def _intern(values, ids, value):
+        value_id = ids.get(value)
+        if value_id is None:
+            value_id = ids[value] = len(values)
+            values.append(value)
+        return value_id
+
+    def __len__(self):
+        return len(self.rows)
+
+    def add(self, booking):
+        """
+        Append a booking, replacing the passenger's previous booking on the same flight, if any.
+        """
+        self.remove(booking[0], booking[2])
+        self.rows[(booking[0], booking[2])] = len(self.live)
+        self.flight_column.append(self._intern(self.flights, self.flight_ids, booking[2]))
+        self.class_column.append(self._intern(self.seat_classes, self.class_codes, booking[4]))
+        self.seat_column.append(self._intern(self.seats, self.seat_ids, booking[3]))
+        self.passenger_column.append(self._intern(self.passengers, self.passenger_ids, booking[0]))
+        self.live.append(1)
+
+    def extend(self, bookings):
+        """
+        Append several bookings, like add. Each (passenger, flight) pair may appear once in bookings.
+        """
+        rows = self.rows
+        for booking in [booking for booking in bookings if (booking[0], booking[2]) in rows]:
+            self.remove(booking[0], booking[2])
+        start = len(self.live)
+        rows.update(zip([(booking[0], booking[2]) for booking in bookings], range(start, start + len(bookings))))
+        self.flight_column.extend(self._intern_all(self.flights, self.flight_ids, [booking[2] for booking in bookings]))
+        self.class_column.extend(self._intern_all(self.seat_classes, self.class_codes, [booking[4] for booking in bookings]))
+        self.seat_column.extend(self._intern_all(self.seats, self.seat_ids, [booking[3] for booking in bookings]))
+        self.passenger_column.extend(self._intern_all(self.passengers, self.passenger_ids, [booking[0] for booking in bookings]))
+        self.live.extend(array("B", [1]) * len(bookings))
+
+    @staticmethod
+    def _intern_all(values, ids, items):
+        """
+        Return the interned ids of several values, interning the new ones.
+        """
+        codes = list(map(ids.get, items))
+        if None not in codes:
+            return codes
+        known = len(ids)
+        setdefault = ids.setdefault
+        codes = [setdefault(item, len(ids)) for item in items]
+        # ids keeps insertion order, so the values interned here are its last keys
+        values.extend(reversed(list(islice(reversed(ids), len(ids) - known))))
+        return codes
+
+    def remove(self, passenger_id, flight_number):
+        """
+        Mark a passenger's booking on a flight as cancelled.
+
+        Returns:
+        - True if the booking was found.
+        """
+        row = self.rows.pop((passenger_id, flight_number), None)
+        if row is None:
+            return False
+        self.live[row] = 0
+        self.cancelled += 1
+        if self.cancelled > self.COMPACTION_THRESHOLD and self.cancelled > len(self.rows):
+            self._compact()
+        return True
+
+    def _compact(self):
+        """
+        Drop the cancelled rows, keeping the interned ids.
+        """
+        columns = (self.flight_column, self.class_column, self.seat_column, self.passenger_column)
+        kept = [row for row, alive in enumerate(self.live) if alive]
+        self._reset()
+        self.flight_column, self.class_column, self.seat_column, self.passenger_column = (
+            array("I", [column[row] for row in kept]) for column in columns
+        )
+        self.live = array("B", [1]) * len(kept)
+        for row in range(len(kept)):
+            passenger = self.passengers[self.passenger_column[row]]
+            self.rows[(passenger, self.flights[self.flight_column[row]])] = row
+
+    def _count_matrix(self):
+        """
+        Count the confirmed bookings per (flight id, class code) in one pass over the columns.
+        Returns a list with one row of class counts per interned flight.
+        """
+        width = len(self.seat_classes)
+        cells = len(self.flights) * width
+        if np is not None:
+            dtype = np.dtype(f"u{self.flight_column.itemsize}")
+            keys = np.frombuffer(self.flight_column, dtype=dtype).astype(np.int64) * width
+            keys += np.frombuffer(self.class_column, dtype=dtype)
+            live = np.frombuffer(self.live, dtype=np.uint8).astype(bool)
+            return np.bincount(keys[live], minlength=cells).reshape(len(self.flights), width).tolist()
+        counts = [0] * cells
+        for flight_id, class_code, alive in zip(self.flight_column, self.class_column, self.live):
+            if alive:
+                counts[flight_id * width + class_code] += 1
+        return [counts[start:start + width] for start in range(0, cells, width)]
+
+    def booked_counts(self):
+        """
+        Count the bookings of every flight by class.
+
+        Returns:
+        - A dictionary mapping each interned flight number to {seat_class: count}.
+        """
+        return {
+            flight_number: dict(zip(self.seat_classes, row))
+            for flight_number, row in zip(self.flights, self._count_matrix())
+        }
+
+    def occupancy(self, capacities):
+        """
+        Compute the booked seats, free seats and load factor of every flight by class.
+
+        Args:
+        - capacities: Dictionary mapping flight numbers to {seat_class: number_of_seats}.
+
+        Returns:
+        - A dictionary mapping each flight in capacities to {seat_class: (booked, free seats, booked / seats)},
+          with a load factor of 0.0 for classes without seats.
+        """
+        booked = self.booked_counts()
+        occupancy = {}
+        for flight_number, classes in capacities.items():
+            flight_booked = booked.get(flight_number, {})
+            occupancy[flight_number] = {
+                seat_class: (
+                    flight_booked.get(seat_class, 0),
+                    seats - flight_booked.get(seat_class, 0),
+                    flight_booked.get(seat_class, 0) / seats if seats else 0.0,
+                )
+                for seat_class, seats in classes.items()
+            }
+        return occupancy
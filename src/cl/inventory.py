@@ -0,0 +1,79 @@
+from itertools import compress, islice
+
+BIT_FLAGS = bytes.maketrans(b"01", b"\x00\x01")  # Binary digits to 0/1 flag bytes
+
+
+class SeatInventory:
+    def __init__(self, seating_list, seat_class):
+        """
+        Track the occupied seats of one class on one flight.
+        Args:
+        - seating_list: The seat numbers available in this class (e.g., [1, 5, 9]).
+        - seat_class: The class these seats belong to (e.g., "First").
+        """
+        self.seating_list = list(seating_list)
+        self.seat_class = seat_class
+        self.seat_numbers = [f"{seat}{seat_class[0]}" for seat in self.seating_list]
+        self.slots = {seat_number: slot for slot, seat_number in enumerate(self.seat_numbers)}
+        self.occupied = 0  # Bitmap over seating_list, bit i set when seat_numbers[i] is taken
+        self.holders = {}  # Seat number -> number of bookings holding it
+        self.booked = 0  # Bookings in this class, including seats outside seating_list
+
+    def is_available(self):
+        """
+        Check whether the class still has room for another booking.
+        """
+        return self.booked < len(self.seating_list)
+
+    def next_free_seat(self):
+        """
+        Return the lowest free seat number in seating_list order, or None if all are taken.
+        """
+        free = ~self.occupied & ((1 << len(self.seating_list)) - 1)
+        if not free:
+            return None
+        return self.seat_numbers[(free & -free).bit_length() - 1]
+
+    def allocate(self, limit):
+        """
+        Reserve up to limit free seats at once, lowest seat first.
+        Returns the list of reserved seat numbers.
+        """
+        free = ~self.occupied & ((1 << len(self.seating_list)) - 1)
+        limit = min(limit, len(self.seating_list) - self.booked)
+        if not free or limit <= 0:
+            return []
+        # One 0/1 byte per seat, lowest seat first, picks the free seats without a loop per bit
+        flags = format(free, "b")[::-1].encode().translate(BIT_FLAGS)
+        seat_numbers = list(islice(compress(self.seat_numbers, flags), limit))
+        # The allocated seats are all the free ones up to the last seat taken
+        self.occupied |= free & ((2 << self.slots[seat_numbers[-1]]) - 1)
+        self.holders.update(dict.fromkeys(seat_numbers, 1))
+        self.booked += len(seat_numbers)
+        return seat_numbers
+
+    def reserve(self, seat_number):
+        """
+        Mark a seat as taken by a booking.
+        """
+        self.booked += 1
+        self.holders[seat_number] = self.holders.get(seat_number, 0) + 1
+        slot = self.slots.get(seat_number)
+        if slot is not None:
+            self.occupied |= 1 << slot
+
+    def release(self, seat_number):
+        """
+        Free a seat previously taken by a booking.
+        """
+        holders = self.holders.get(seat_number, 0)
+        if not holders:
+            return
+        self.booked -= 1
+        if holders > 1:
+            self.holders[seat_number] = holders - 1
+            return
+        del self.holders[seat_number]
+        slot = self.slots.get(seat_number)
+        if slot is not None:
+            self.occupied &= ~(1 << slot)
@@ -0,0 +1,62 @@
+from bisect import bisect_left, bisect_right, insort
+
+
+class LegInstanceIndex:
+    def __init__(self, leg_instances=()):
+        """
+        Index of leg instances by (flight number, leg number, date).
+        Each flight also keeps its (date, leg number) keys in a sorted list, so all the instances
+        of a flight, or those of one date, are found with a binary search instead of a scan.
+        Args:
+        - leg_instances: LegInstance records (see records.py).
+        """
+        self.instances = {}  # (flight_number, leg_number, date) -> leg instance
+        self.dates = {}  # flight_number -> sorted [(date, leg_number)]
+        for leg in leg_instances:
+            self.add(leg)
+
+    def __len__(self):
+        return len(self.instances)
+
+    def add(self, leg):
+        """
+        Add a leg instance, replacing the instance with the same key, if any.
+        """
+        key = (leg.Flight_number, leg.Leg_number, leg.Date)
+        if key not in self.instances:
+            insort(self.dates.setdefault(leg.Flight_number, []), (leg.Date, leg.Leg_number))
+        self.instances[key] = leg
+
+    def remove(self, leg):
+        """
+        Remove the leg instance with the same key as leg, if it is indexed.
+        """
+        key = (leg.Flight_number, leg.Leg_number, leg.Date)
+        if self.instances.pop(key, None) is None:
+            return
+        dates = self.dates[leg.Flight_number]
+        del dates[bisect_left(dates, (leg.Date, leg.Leg_number))]
+        if not dates:
+            del self.dates[leg.Flight_number]
+
+    def get(self, flight_number, leg_number, date):
+        """
+        Return the leg instance of a flight leg on a date, or None.
+        """
+        return self.instances.get((flight_number, leg_number, date))
+
+    def for_flight(self, flight_number, date=None):
+        """
+        Return the leg instances of a flight, ordered by date and leg number.
+
+        Args:
+        - flight_number: The flight number.
+        - date: If given, only return the instances on this date.
+
+        Returns:
+        - A list of leg instances.
+        """
+        dates = self.dates.get(flight_number, [])
+        if date is not None:
+            dates = dates[bisect_left(dates, (date,)):bisect_right(dates, (date, float("inf")))]
+        return [self.instances[(flight_number, leg_number, day)] for day, leg_number in dates]
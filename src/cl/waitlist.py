@@ -0,0 +1,188 @@
+class FenwickTree:
+    def __init__(self, values=()):
+        """
+        Binary indexed tree over a growable array of integers.
+        Supports point updates, prefix sums and appends in O(log n).
+        Args:
+        - values: Initial values, built in O(n).
+        """
+        self.tree = [0] + list(values)
+        size = len(self.tree)
+        for i in range(1, size):
+            parent = i + (i & -i)
+            if parent < size:
+                self.tree[parent] += self.tree[i]
+
+    def __len__(self):
+        return len(self.tree) - 1
+
+    def add(self, index, delta):
+        """
+        Add delta to the value at a 0-based index.
+        """
+        i = index + 1
+        size = len(self.tree)
+        while i < size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix_sum(self, index):
+        """
+        Return the sum of the values at 0-based indices 0..index inclusive.
+        """
+        total = 0
+        i = index + 1
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def append(self, value):
+        """
+        Append a value to the end of the array.
+        """
+        i = len(self.tree)
+        # tree[i] covers the range (i - lowbit(i), i], so it holds value plus the tail of that range
+        covered = self.prefix_sum(i - 2) - self.prefix_sum(i - (i & -i) - 1)
+        self.tree.append(value + covered)
+
+    def extend(self, values):
+        """
+        Append several values in O(k + log n), from the running prefix sums of the new values.
+        """
+        start = len(self.tree)  # 1-based index of the first new value
+        prefix = [self.prefix_sum(start - 2)]  # prefix[k] is the sum of the first start - 1 + k values
+        for value in values:
+            prefix.append(prefix[-1] + value)
+        for i in range(start, start + len(prefix) - 1):
+            low = i - (i & -i)
+            # tree[i] covers (low, i]; only ranges reaching back before start query the old tree
+            before = prefix[low - start + 1] if low >= start - 1 else self.prefix_sum(low - 1)
+            self.tree.append(prefix[i - start + 1] - before)
+
+
+class WaitlistQueue:
+    # Rebuild the queue once removed slots outnumber live entries (and at least this many exist)
+    COMPACTION_THRESHOLD = 64
+
+    def __init__(self):
+        """
+        FIFO waitlist for one class on one flight, with O(log n) positions and removals.
+        Each entry carries the global arrival sequence number it was added with, so queues
+        of different flights can still be merged back into overall arrival order.
+        Removed entries leave an empty slot behind; a Fenwick tree over the slots counts the
+        live entries ahead of any passenger.
+        """
+        self._reset([], [])
+
+    def _reset(self, sequences, passengers):
+        self.sequences = list(sequences)  # Slot -> global arrival sequence number
+        self.slots = list(passengers)  # Slot -> passenger, or None once removed
+        self.slot_of = {passenger[0]: slot for slot, passenger in enumerate(self.slots)}
+        self.live = FenwickTree([1] * len(self.slots))
+        self.head = 0  # No live slot before this one
+        self.size = len(self.slots)
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        """
+        Iterate over the waitlisted passengers in queue order.
+        """
+        return (passenger for _, passenger in self.items())
+
+    def items(self):
+        """
+        Iterate over (sequence, passenger) pairs in queue order.
+        """
+        for slot in range(self.head, len(self.slots)):
+            passenger = self.slots[slot]
+            if passenger is not None:
+                yield self.sequences[slot], passenger
+
+    def append(self, passenger, sequence):
+        """
+        Add a passenger to the back of the queue.
+        Args:
+        - passenger: The waitlist entry (e.g., [passenger_id, passenger_name, flight_number]).
+        - sequence: The global arrival sequence number of the entry.
+        """
+        self.slot_of[passenger[0]] = len(self.slots)
+        self.slots.append(passenger)
+        self.sequences.append(sequence)
+        self.live.append(1)
+        self.size += 1
+
+    def extend(self, passengers, sequences):
+        """
+        Add several passengers to the back of the queue, in order.
+        Args:
+        - passengers: The waitlist entries.
+        - sequences: The global arrival sequence number of each entry.
+        """
+        start = len(self.slots)
+        self.slot_of.update(zip([passenger[0] for passenger in passengers], range(start, start + len(passengers))))
+        self.slots.extend(passengers)
+        self.sequences.extend(sequences)
+        self.live.extend([1] * len(passengers))
+        self.size += len(passengers)
+
+    def popleft(self):
+        """
+        Remove and return the passenger at the front of the queue.
+        """
+        passenger = self.peek()
+        if passenger is None:
+            raise IndexError("pop from an empty waitlist")
+        self._clear_slot(self.head)
+        return passenger
+
+    def peek(self):
+        """
+        Return the passenger at the front of the queue without removing it, or None if empty.
+        """
+        while self.head < len(self.slots) and self.slots[self.head] is None:
+            self.head += 1
+        return self.slots[self.head] if self.head < len(self.slots) else None
+
+    def remove(self, passenger):
+        """
+        Remove a passenger from anywhere in the queue.
+        Returns True if the passenger was found.
+        """
+        slot = self.slot_of.get(passenger[0])
+        if slot is None or self.slots[slot] is not passenger:
+            return False
+        self._clear_slot(slot)
+        return True
+
+    def position(self, passenger):
+        """
+        Return the 1-based position of a passenger in the queue, or None if not queued.
+        """
+        slot = self.slot_of.get(passenger[0])
+        if slot is None or self.slots[slot] is not passenger:
+            return None
+        return self.live.prefix_sum(slot)
+
+    def reorder(self, passengers):
+        """
+        Replace the queue order with the given passengers, reusing the existing sequence numbers
+        so the queue keeps its place in the overall arrival order.
+        Args:
+        - passengers: The queued passengers in their new order.
+        """
+        sequences = sorted(sequence for sequence, _ in self.items())
+        self._reset(sequences, passengers)
+
+    def _clear_slot(self, slot):
+        passenger = self.slots[slot]
+        del self.slot_of[passenger[0]]
+        self.slots[slot] = None
+        self.live.add(slot, -1)
+        self.size -= 1
+        removed = len(self.slots) - self.size
+        if removed > self.COMPACTION_THRESHOLD and removed > self.size:
+            entries = list(self.items())
+            self._reset([sequence for sequence, _ in entries], [passenger for _, passenger in entries])
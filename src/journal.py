@@ -0,0 +1,152 @@
+import json
+import os
+import threading
+from contextlib import nullcontext
+
+JOURNAL_SUFFIX = ".journal"
+CHECKPOINT_SUFFIX = ".checkpoint"
+
+
+def journal_path_for(db_path):
+    """
+    Return the default journal path for a DB file (AirlineResDB.txt -> AirlineResDB.journal).
+    """
+    return os.path.splitext(db_path)[0] + JOURNAL_SUFFIX
+
+
+class Journal:
+    def __init__(self, path, checkpoint_every=10000, sync=True):
+        """
+        Append-only write-ahead journal of booking events, stored as JSON lines.
+        Records are appended in memory and written by commit(), which writes and fsyncs every record
+        appended so far with a single write: concurrent committers share one fsync (group commit).
+        A checkpoint stores the full state (flights, bookings and waitlists) next to the journal and
+        empties the journal, so replay only has to cover the records since the last checkpoint.
+        Args:
+        - path: Path to the journal file. The checkpoint is stored at path + ".checkpoint".
+        - checkpoint_every: Number of records after which a checkpoint is due.
+        - sync: If False, skip fsync (records survive a process crash but not a power loss).
+        """
+        self.path = path
+        self.checkpoint_path = path + CHECKPOINT_SUFFIX
+        self.checkpoint_every = checkpoint_every
+        self.sync = sync
+        self._cond = threading.Condition()
+        self._pending = []  # Encoded records not written yet
+        self._flushing = False
+        self.writes = 0  # Batched writes so far; fewer than commits when group commit kicks in
+
+        self.checkpoint_state, checkpoint_seq = None, 0
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, encoding="utf-8") as file:
+                checkpoint = json.load(file)
+            self.checkpoint_state, checkpoint_seq = checkpoint["state"], checkpoint["seq"]
+        self.records = [record for record in self._read_records() if record["seq"] > checkpoint_seq]
+        self._seq = self.records[-1]["seq"] if self.records else checkpoint_seq
+        self._written = self._seq
+        self.records_since_checkpoint = len(self.records)
+        self.file = open(path, "a", encoding="utf-8")
+
+    def _read_records(self):
+        """
+        Read the records of the journal file. A torn record at the end (from a crash in the middle
+        of a write) is dropped and truncated away.
+        """
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "rb") as file:
+            data = file.read()
+        records = []
+        offset = 0
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                if offset + len(line) < len(data):
+                    raise ValueError(f"Corrupt record in journal {self.path} at byte {offset}.")
+                break
+            offset += len(line)
+        if offset < len(data):
+            with open(self.path, "r+b") as file:
+                file.truncate(offset)
+        return records
+
+    def transaction(self):
+        """
+        Return the context a request holds while it appends and commits. Appends are ordered by
+        sequence number, so requests share the journal without waiting for each other.
+        """
+        return nullcontext()
+
+    def append(self, event, *args):
+        """
+        Append a record to the journal. It is durable once commit() returns.
+
+        Returns:
+        - The sequence number of the record.
+        """
+        with self._cond:
+            self._seq += 1
+            self._pending.append(json.dumps({"seq": self._seq, "event": event, "args": args}) + "\n")
+            self.records_since_checkpoint += 1
+            return self._seq
+
+    def commit(self):
+        """
+        Write and fsync every record appended so far, sharing the write with concurrent committers.
+        """
+        with self._cond:
+            target = self._seq
+            while self._written < target:
+                if self._flushing:
+                    # Another thread is writing; its batch or the next one will include our records
+                    self._cond.wait()
+                    continue
+                self._flushing = True
+                batch, self._pending = self._pending, []
+                last = self._seq
+                self._cond.release()
+                try:
+                    self.file.write("".join(batch))
+                    self.file.flush()
+                    if self.sync:
+                        os.fsync(self.file.fileno())
+                    self.writes += 1
+                finally:
+                    self._cond.acquire()
+                    self._flushing = False
+                    self._cond.notify_all()
+                self._written = last
+
+    def checkpoint_due(self):
+        return self.records_since_checkpoint >= self.checkpoint_every
+
+    def checkpoint(self, state):
+        """
+        Store the full booking state and empty the journal.
+        The caller must keep other threads from appending until this returns, so that state
+        reflects exactly the records appended so far.
+
+        Args:
+        - state: JSON-serializable booking state (see BookingManager.export_state).
+        """
+        self.commit()
+        with self._cond:
+            temporary_path = self.checkpoint_path + ".tmp"
+            with open(temporary_path, "w", encoding="utf-8") as file:
+                json.dump({"seq": self._seq, "state": state}, file)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temporary_path, self.checkpoint_path)
+            # Records up to seq are skipped on replay, so a crash before this truncation is harmless
+            self.file.truncate(0)
+            self.file.flush()
+            if self.sync:
+                os.fsync(self.file.fileno())
+            self.records_since_checkpoint = 0
+
+    def close(self):
+        self.commit()
+        self.file.close()
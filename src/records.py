@@ -0,0 +1,119 @@
+from collections import namedtuple
+from functools import lru_cache
+
+
+def _record(name, fields):
+    """
+    Create a compact, immutable record type. Fields missing from a short row default to None.
+    """
+    return namedtuple(name, fields, defaults=(None,) * len(fields))
+
+
+# Rows of the AirlineResDB.txt sections, with the field names used in the section headers
+class Airport(_record("Airport", ["Airport_code", "Name", "City", "State"])):
+    __slots__ = ()
+
+
+class Flight(_record("Flight", ["Flight_number", "Airline", "Weekdays"])):
+    __slots__ = ()
+
+
+class Fare(_record("Fare", ["Flight_number", "Fare_code", "Amount", "Restrictions"])):
+    __slots__ = ()
+
+
+class AirplaneType(_record("AirplaneType", ["Airplane_type_name", "Max_seats", "Company"])):
+    __slots__ = ()
+
+
+class Airplane(_record("Airplane", ["Airplane_id", "Total_number_of_seats", "Airplane_type"])):
+    __slots__ = ()
+
+
+class CanLand(_record("CanLand", ["Airplane_type_name", "Airport_code"])):
+    __slots__ = ()
+
+
+class FlightLeg(_record("FlightLeg", [
+    "Flight_number", "Leg_number", "Departure_airport_code", "Scheduled_departure_time",
+    "Arrival_airport_code", "Scheduled_arrival_time"
+])):
+    __slots__ = ()
+
+
+class LegInstance(_record("LegInstance", [
+    "Flight_number", "Leg_number", "Date", "Number_of_available_seats", "Airplane_id",
+    "Departure_airport_code", "Departure_time", "Arrival_airport_code", "Arrival_time"
+])):
+    __slots__ = ()
+
+
+class SeatReservation(_record("SeatReservation", [
+    "Flight_number", "Leg_number", "Date", "Seat_number", "Customer_name", "PassengerID"
+])):
+    __slots__ = ()
+
+
+# Section name -> record type
+SECTION_RECORDS = {
+    "Airport": Airport,
+    "Flight": Flight,
+    "Fare": Fare,
+    "Airplane_type": AirplaneType,
+    "Airplane": Airplane,
+    "Can_land": CanLand,
+    "Flight_leg": FlightLeg,
+    "Leg_instance": LegInstance,
+    "Seat_reservation": SeatReservation,
+}
+
+
+# Section name -> fields identifying a row, used to detect the same row coming from two DB files
+SECTION_KEYS = {
+    "Airport": ("Airport_code",),
+    "Flight": ("Flight_number",),
+    "Fare": ("Flight_number", "Fare_code"),
+    "Airplane_type": ("Airplane_type_name",),
+    "Airplane": ("Airplane_id",),
+    "Can_land": ("Airplane_type_name", "Airport_code"),
+    "Flight_leg": ("Flight_number", "Leg_number"),
+    "Leg_instance": ("Flight_number", "Leg_number", "Date"),
+    "Seat_reservation": ("Flight_number", "Leg_number", "Date", "Seat_number"),
+}
+
+
+# Bookings held by BookingManager. Both still index like the lists they replace
+# (booking[0] is the PassengerID, booking[2] the flight number, ...).
+class Booking(namedtuple("Booking", ["passenger_id", "passenger_name", "flight_number", "seat_number", "seat_class"])):
+    __slots__ = ()
+
+    @classmethod
+    def from_reservation(cls, reservation):
+        """
+        Build the booking of a Seat_reservation row, inferring the class from the seat number
+        (e.g., "1A" -> "First").
+        """
+        seat_number = reservation.Seat_number
+        seat_class = "First" if seat_number[0] in ["1", "F"] else "Business" if seat_number[0] in ["2", "B"] else "Economy"
+        return cls(reservation.PassengerID, reservation.Customer_name, reservation.Flight_number, seat_number, seat_class)
+
+
+class WaitlistEntry(namedtuple("WaitlistEntry", ["passenger_id", "passenger_name", "flight_number"])):
+    __slots__ = ()
+
+
+def record_type(section, field_names):
+    """
+    Return the record type for a section with the given header fields.
+    Sections without a matching predefined type get a namedtuple built from their header.
+    """
+    field_names = tuple(field_names)
+    record = SECTION_RECORDS.get(section)
+    if record is not None and record._fields == field_names:
+        return record
+    return _generated_record(section, field_names)
+
+
+@lru_cache(maxsize=None)
+def _generated_record(section, field_names):
+    return _record(section, field_names)
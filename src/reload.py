@@ -0,0 +1,190 @@
+import hashlib
+import os
+import threading
+from collections import Counter
+from booking_manager_03 import default_seating_list, flight_endpoints
+from records import Booking
+from utils import _decode_section, _section_lines, section_ranges
+
+# Sections are applied in this order, so flights exist before their legs and reservations
+# are applied, and flights are only removed once everything else is up to date.
+APPLY_ORDER = ["Airport", "Flight", "Flight_leg", "Leg_instance", "Seat_reservation"]
+
+
+class DBReloader:
+    def __init__(self, manager, db_path, seating_list=default_seating_list):
+        """
+        Keep a BookingManager in sync with edits to the AirlineResDB.txt file it was built from.
+        Each reload hashes the sections of the file, and only the rows of sections whose hash changed
+        are diffed, decoded and applied. Bookings made through the manager are kept.
+        Args:
+        - manager: The BookingManager built from db_path.
+        - db_path: Path to the AirlineResDB.txt file.
+        - seating_list: Function returning the seating list of flights added to the file.
+        """
+        self.manager = manager
+        self.db_path = db_path
+        self.seating_list = seating_list
+        self.sections = {}  # section -> (digest, header row, Counter of row lines)
+        self.file_stat = None
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.sections, _, self.file_stat = self._scan()
+
+    def _scan(self):
+        """
+        Read and hash the sections of the file.
+
+        Returns:
+        - The new section states, {section: (old_header, old_rows, new_header, new_rows)} for every
+          section whose content hash changed since the last read, and the file's (mtime, size).
+        """
+        stat = os.stat(self.db_path)
+        with open(self.db_path, "rb") as file:
+            buffer = file.read()
+        changes = {}
+        sections = {}
+        for section, (start, end) in section_ranges(buffer).items():
+            raw = buffer[start:end]
+            digest = hashlib.blake2b(raw, digest_size=16).digest()
+            previous = self.sections.get(section)
+            if previous and previous[0] == digest:
+                sections[section] = previous
+                continue
+            lines = list(_section_lines(raw.decode("utf-8").splitlines()))
+            header, rows = (lines[0], Counter(lines[1:])) if lines else (None, Counter())
+            sections[section] = (digest, header, rows)
+            changes[section] = (*(previous[1:] if previous else (None, Counter())), header, rows)
+        for section in self.sections.keys() - sections.keys():
+            changes[section] = (*self.sections[section][1:], None, Counter())
+        return sections, changes, (stat.st_mtime_ns, stat.st_size)
+
+    def reload(self):
+        """
+        Apply the changes made to the DB file since it was last read.
+
+        Returns:
+        - A dictionary mapping each changed section to its (added rows, removed rows) record lists.
+          Empty if the file did not change.
+        """
+        with self._lock:
+            stat = os.stat(self.db_path)
+            if (stat.st_mtime_ns, stat.st_size) == self.file_stat:
+                return {}
+            sections, changes, file_stat = self._scan()
+            deltas = {}
+            for section, (old_header, old_rows, new_header, new_rows) in changes.items():
+                if old_header == new_header:
+                    removed, added = old_rows - new_rows, new_rows - old_rows
+                else:
+                    removed, added = old_rows, new_rows
+                deltas[section] = (
+                    _decode_rows(section, new_header, added.elements()),
+                    _decode_rows(section, old_header, removed.elements())
+                )
+            # Only remember the new file contents once every changed row decoded
+            self.sections, self.file_stat = sections, file_stat
+            self._apply(deltas)
+            return deltas
+
+    def _apply(self, deltas):
+        """
+        Apply decoded row deltas to the manager.
+        """
+        manager = self.manager
+        added, removed = {}, {}
+        for section in APPLY_ORDER:
+            added[section], removed[section] = deltas.get(section, ([], []))
+
+        for airport in removed["Airport"]:
+            manager.airport_data.pop(airport.Airport_code, None)
+        for airport in added["Airport"]:
+            manager.airport_data[airport.Airport_code] = airport
+        if added["Airport"] or removed["Airport"]:
+            # Airport names appear in the rendering of every flight
+            manager.render_cache.clear()
+
+        removed_flights = {flight.Flight_number for flight in removed["Flight"]}
+        removed_flights -= {flight.Flight_number for flight in added["Flight"]}
+        for flight in removed["Flight"]:
+            manager.flight_data.pop(flight.Flight_number, None)
+        for flight in added["Flight"]:
+            manager.flight_data[flight.Flight_number] = flight
+
+        # Flights whose details or legs may have changed
+        flight_numbers = {flight.Flight_number for flight in added["Flight"]}
+        if added["Flight_leg"] or removed["Flight_leg"]:
+            flight_numbers |= manager.update_flight_legs(added["Flight_leg"], removed["Flight_leg"])
+        for flight_number in sorted(flight_numbers):
+            flight = manager.flight_data.get(flight_number)
+            if flight is None:
+                continue
+            departure, arrival = flight_endpoints(manager.legs_by_flight.get(flight_number))
+            manager.upsert_flight(flight_number, departure, arrival, flight.Weekdays or "Unknown", self.seating_list())
+
+        if added["Leg_instance"] or removed["Leg_instance"]:
+            manager.update_leg_instances(added["Leg_instance"], removed["Leg_instance"])
+
+        # A reservation whose seat was edited shows up as a removed and an added row of the same
+        # passenger and flight. It is applied as a seat change: cancelling it first would promote
+        # a waitlisted passenger into the freed seat and overbook the flight once it is re-added.
+        removed_reservations = {
+            (reservation.Flight_number, reservation.PassengerID): reservation
+            for reservation in removed["Seat_reservation"]
+        }
+        for reservation in added["Seat_reservation"]:
+            booking = Booking.from_reservation(reservation)
+            old_reservation = removed_reservations.pop((reservation.Flight_number, reservation.PassengerID), None)
+            current = manager.flight_bookings.get(reservation.Flight_number, {}).get(reservation.PassengerID)
+            if old_reservation and current and current[3] == old_reservation.Seat_number:
+                manager.change_booking(booking)
+            else:
+                manager.add_booking(booking)
+        # Removals come after additions, so seats they free are only given to waitlisted passengers
+        # if the added reservations left room
+        for reservation in removed_reservations.values():
+            booking = manager.flight_bookings.get(reservation.Flight_number, {}).get(reservation.PassengerID)
+            if booking and booking[3] == reservation.Seat_number:
+                manager.cancel_booking(reservation.PassengerID, reservation.Flight_number)
+
+        for flight_number in sorted(removed_flights):
+            manager.remove_flight(flight_number, rebook_to=manager.find_alternative_flights(flight_number))
+
+    def start(self, interval=1.0):
+        """
+        Watch the DB file in a background thread, reloading it whenever it changes.
+        Errors (e.g., a half-written file) are kept in last_error, and the reload is retried on the next check.
+        """
+        if self._thread:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, args=(interval,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop watching the DB file.
+        """
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _watch(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.reload()
+                self.last_error = None
+            except (OSError, ValueError) as error:
+                self.last_error = error
+
+
+def _decode_rows(section, header, lines):
+    """
+    Decode row lines of a section with the given header row.
+    """
+    if header is None:
+        return []
+    return list(_decode_section(section, iter([header, *lines])))
@@ -0,0 +1,251 @@
+import argparse
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+from datetime import date
+from records import record_type
+from utils import LazyAirlineResDB, _records_from_columns, _scan_sections, compile_row_decoder, parse_header
+
+# Snapshot layout (all integers little-endian):
+#   header:   magic, section count, string table size in bytes, string table offset
+#   sections: name id, column count, row count, then per column the id of its header text
+#             (as written in the DB header, e.g. "Date:date") and the offset of its values
+#   strings:  the interned strings as UTF-8, separated by newlines (DB values never contain one)
+#   columns:  per section and column, row count fixed-width values, already converted:
+#             str columns hold uint32 string ids, int and time columns int64 numbers (times in
+#             minutes since midnight) and date columns int64 ordinals. Values missing from short
+#             rows are MISSING_ID or MISSING_NUMBER.
+MAGIC = b"ARDBSNP2"
+HEADER = struct.Struct("<8sIIQ")
+SECTION = struct.Struct("<III")
+COLUMN = struct.Struct("<IQ")
+MISSING_ID = 0xFFFFFFFF
+MISSING_NUMBER = -2 ** 63
+SNAPSHOT_SUFFIX = ".snap"
+
+
+def snapshot_path_for(db_path):
+    """
+    Return the default snapshot path for a DB file (AirlineResDB.txt -> AirlineResDB.snap).
+    """
+    return os.path.splitext(db_path)[0] + SNAPSHOT_SUFFIX
+
+
+def _column_array(type_name):
+    """
+    Return an empty array for the stored values of a column type.
+    """
+    return array("I") if type_name == "str" else array("q")
+
+
+def _to_stored(type_name, value, intern):
+    """
+    Convert a decoded value to the number stored for it in a column of type_name.
+    """
+    if value is None:
+        return MISSING_ID if type_name == "str" else MISSING_NUMBER
+    if type_name == "str":
+        return intern(value)
+    if type_name == "date":
+        return value.toordinal()
+    return value
+
+
+def build_snapshot(db_path, snapshot_path=None):
+    """
+    Compile an AirlineResDB.txt file into a binary snapshot.
+    Values are converted once here (dates, times and numbers parsed), so loading needs no parsing.
+
+    Args:
+    - db_path: Path to the AirlineResDB.txt file.
+    - snapshot_path: Where to write the snapshot. Defaults to snapshot_path_for(db_path).
+
+    Returns:
+    - The path of the written snapshot.
+    """
+    snapshot_path = snapshot_path or snapshot_path_for(db_path)
+
+    strings = {}  # string -> id, interned so repeated values are stored once
+
+    def intern(value):
+        string_id = strings.get(value)
+        if string_id is None:
+            string_id = strings[value] = len(strings)
+        return string_id
+
+    sections = {}
+    with open(db_path, 'r') as file:
+        for name, lines in _scan_sections(file):
+            header = next(lines, None)
+            columns = parse_header(header) if header else ()
+            decode = compile_row_decoder(name, columns)
+            arrays = [_column_array(type_name) for _, type_name in columns]
+            row_count = 0
+            for line in lines:
+                record = decode(line.split(", "))
+                for (_, type_name), values, value in zip(columns, arrays, record):
+                    values.append(_to_stored(type_name, value, intern))
+                row_count += 1
+            if sys.byteorder == "big":
+                for values in arrays:
+                    values.byteswap()
+            column_ids = [intern(column) for column in header.split(", ")] if header else []
+            sections[name] = (intern(name), column_ids, row_count, [values.tobytes() for values in arrays])
+    sections = list(sections.values())
+
+    blob = "\n".join(strings).encode("utf-8")
+    section_table_size = sum(SECTION.size + COLUMN.size * len(column_ids) for _, column_ids, _, _ in sections)
+    strings_offset = HEADER.size + section_table_size
+    data_offset = strings_offset + len(blob)
+
+    with open(snapshot_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, len(sections), len(blob), strings_offset))
+        for name_id, column_ids, row_count, packed_columns in sections:
+            file.write(SECTION.pack(name_id, len(column_ids), row_count))
+            for column_id, packed in zip(column_ids, packed_columns):
+                file.write(COLUMN.pack(column_id, data_offset))
+                data_offset += len(packed)
+        file.write(blob)
+        for _, _, _, packed_columns in sections:
+            for packed in packed_columns:
+                file.write(packed)
+    return snapshot_path
+
+
+class Snapshot(Mapping):
+    def __init__(self, snapshot_path):
+        """
+        Read-only mapping over a binary snapshot written by build_snapshot.
+        Only the header and section table are read up front. A section is decoded into a list of
+        records the first time it is accessed, one whole column at a time, and then cached.
+        The snapshot keeps its file mapped until close() (or the end of a with block).
+        Args:
+        - snapshot_path: Path to the snapshot file.
+        """
+        self.file = open(snapshot_path, "rb")
+        try:
+            self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            self.file.close()
+            raise
+        magic, section_count, strings_size, strings_offset = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{snapshot_path} is not an airline DB snapshot.")
+        # One decode and one split for the whole table
+        self.strings = self.buffer[strings_offset:strings_offset + strings_size].decode("utf-8").split("\n")
+
+        self.offsets = {}  # section -> (columns, row_count, [column offset])
+        self.sections = {}  # section -> decoded records
+        offset = HEADER.size
+        table = []
+        for _ in range(section_count):
+            name_id, column_count, row_count = SECTION.unpack_from(self.buffer, offset)
+            offset += SECTION.size
+            column_entries = [COLUMN.unpack_from(self.buffer, offset + COLUMN.size * i) for i in range(column_count)]
+            offset += COLUMN.size * column_count
+            table.append((name_id, column_entries, row_count))
+        for name_id, column_entries, row_count in table:
+            header = ", ".join(self.strings[column_id] for column_id, _ in column_entries)
+            columns = parse_header(header) if column_entries else ()
+            self.offsets[self.strings[name_id]] = (columns, row_count, [offset for _, offset in column_entries])
+
+    def __getitem__(self, section):
+        records = self.sections.get(section)
+        if records is None:
+            if section not in self.offsets:
+                raise KeyError(section)
+            records = self.sections[section] = self._decode(section)
+        return records
+
+    def __iter__(self):
+        return iter(self.offsets)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def _decode(self, section):
+        """
+        Decode every row of a section into records, converting whole columns at once.
+        """
+        columns, row_count, column_offsets = self.offsets[section]
+        record = record_type(section, [name for name, _ in columns])
+        decoded = []
+        for (_, type_name), offset in zip(columns, column_offsets):
+            values = _column_array(type_name)
+            values.frombytes(self.buffer[offset:offset + values.itemsize * row_count])
+            if sys.byteorder == "big":
+                values.byteswap()
+            decoded.append(_from_stored(type_name, values, self.strings))
+        return _records_from_columns(record, row_count, decoded)
+
+    def close(self):
+        self.buffer.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _from_stored(type_name, values, strings):
+    """
+    Convert the stored values of one column back to field values.
+    """
+    if type_name == "str":
+        if MISSING_ID in values:
+            return [None if value == MISSING_ID else strings[value] for value in values]
+        return list(map(strings.__getitem__, values))
+    if MISSING_NUMBER in values:
+        values = [None if value == MISSING_NUMBER else value for value in values]
+        if type_name == "date":
+            return [None if value is None else date.fromordinal(value) for value in values]
+        return values
+    if type_name == "date":
+        return list(map(date.fromordinal, values))
+    return values.tolist()
+
+
+def load_snapshot(snapshot_path, sections=None):
+    """
+    Load a binary snapshot.
+
+    Args:
+    - snapshot_path: Path to the snapshot file.
+    - sections: Names of the sections to load. Defaults to all sections.
+
+    Returns:
+    - A dictionary mapping section names to lists of records.
+    """
+    with Snapshot(snapshot_path) as snapshot:
+        return {section: snapshot[section] for section in sections or snapshot if section in snapshot}
+
+
+def load_airline_res_db(db_path):
+    """
+    Load the airline DB, using its snapshot when one exists and is newer than the text file.
+    Without a snapshot, sections of the text file are parsed when first accessed (see LazyAirlineResDB).
+
+    Args:
+    - db_path: Path to the AirlineResDB.txt file.
+
+    Returns:
+    - A mapping of section names to records, in the same shape parse_airline_res_db returns.
+    """
+    snapshot_path = snapshot_path_for(db_path)
+    if os.path.exists(snapshot_path) and os.path.getmtime(snapshot_path) >= os.path.getmtime(db_path):
+        return load_snapshot(snapshot_path)
+    return LazyAirlineResDB(db_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile an AirlineResDB.txt file into a binary snapshot.")
+    parser.add_argument("db_path", help="Path to the AirlineResDB.txt file.")
+    parser.add_argument("snapshot_path", nargs="?", help="Where to write the snapshot (defaults to <db>.snap).")
+    args = parser.parse_args()
+    print(f"Snapshot written to {build_snapshot(args.db_path, args.snapshot_path)}")
@@ -0,0 +1,244 @@
+import json
+import os
+import sqlite3
+import threading
+
+SQLITE_SUFFIX = ".sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS flights (
+    flight_number TEXT PRIMARY KEY,
+    departure TEXT,
+    arrival TEXT,
+    weekdays TEXT,
+    seating_list TEXT
+);
+CREATE TABLE IF NOT EXISTS bookings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    passenger_id TEXT NOT NULL,
+    passenger_name TEXT,
+    flight_number TEXT NOT NULL,
+    seat_number TEXT,
+    seat_class TEXT,
+    UNIQUE (passenger_id, flight_number)
+);
+CREATE INDEX IF NOT EXISTS bookings_by_flight ON bookings (flight_number, seat_class);
+CREATE TABLE IF NOT EXISTS waitlist (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    seat_class TEXT NOT NULL,
+    passenger_id TEXT NOT NULL,
+    passenger_name TEXT,
+    flight_number TEXT NOT NULL,
+    UNIQUE (passenger_id, flight_number)
+);
+CREATE INDEX IF NOT EXISTS waitlist_by_flight ON waitlist (flight_number, seat_class, seq);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Statements are kept as constants so that sqlite3's statement cache prepares each one only once
+INSERT_BOOKING = (
+    "INSERT OR REPLACE INTO bookings (passenger_id, passenger_name, flight_number, seat_number, seat_class) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+INSERT_WAITLIST = (
+    "INSERT OR REPLACE INTO waitlist (seat_class, passenger_id, passenger_name, flight_number) VALUES (?, ?, ?, ?)"
+)
+DELETE_BOOKING = "DELETE FROM bookings WHERE passenger_id = ? AND flight_number = ?"
+DELETE_WAITLIST = "DELETE FROM waitlist WHERE passenger_id = ? AND flight_number = ?"
+SELECT_WAITLIST_SEQS = "SELECT seq, passenger_id FROM waitlist WHERE flight_number = ? AND seat_class = ? ORDER BY seq"
+NEGATE_WAITLIST_SEQS = "UPDATE waitlist SET seq = -seq WHERE flight_number = ? AND seat_class = ?"
+UPDATE_WAITLIST_SEQ = "UPDATE waitlist SET seq = ? WHERE passenger_id = ? AND flight_number = ?"
+INSERT_FLIGHT = (
+    "INSERT OR REPLACE INTO flights (flight_number, departure, arrival, weekdays, seating_list) VALUES (?, ?, ?, ?, ?)"
+)
+DELETE_FLIGHT = "DELETE FROM flights WHERE flight_number = ?"
+SELECT_PASSENGER_BOOKINGS = (
+    "SELECT flight_number, seat_number, seat_class FROM bookings WHERE passenger_id = ? ORDER BY id"
+)
+SELECT_PASSENGER_WAITLISTS = (
+    "SELECT w.flight_number, w.seat_class, "
+    "(SELECT COUNT(*) FROM waitlist AS ahead "
+    "WHERE ahead.flight_number = w.flight_number AND ahead.seat_class = w.seat_class AND ahead.seq <= w.seq) "
+    "FROM waitlist AS w WHERE w.passenger_id = ? ORDER BY w.seq"
+)
+
+
+def sqlite_path_for(db_path):
+    """
+    Return the default SQLite path for a DB file (AirlineResDB.txt -> AirlineResDB.sqlite3).
+    """
+    return os.path.splitext(db_path)[0] + SQLITE_SUFFIX
+
+
+class SQLiteStorage:
+    def __init__(self, path, sync=True):
+        """
+        SQLite storage of bookings, waitlists and flights, kept next to the in-memory structures
+        of a BookingManager (see BookingManager.attach_storage).
+        Each change the manager records is applied to the tables right away, inside a transaction
+        that commit() closes once per request, so a request is stored completely or not at all.
+        All requests share one connection, so they hold transaction() from start to commit, one at a time:
+        otherwise one request's commit would also commit the half-finished changes of another.
+        The tables are indexed by passenger and by flight, so they can also be queried directly.
+        Args:
+        - path: Path to the SQLite database file (":memory:" for a temporary database).
+        - sync: If False, skip syncing commits to disk (changes survive a process crash but not a power loss).
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level="DEFERRED")
+        self.connection.executescript(SCHEMA)
+        self.connection.execute(f"PRAGMA synchronous = {'FULL' if sync else 'OFF'}")
+        if path != ":memory:":
+            self.connection.execute("PRAGMA journal_mode = WAL")
+        self._lock = threading.RLock()  # Held by the request whose changes are in the open transaction
+        self.writes = 0  # Committed transactions
+        self.records = []  # The tables always hold the latest state, so there is nothing to replay
+        self.checkpoint_state = self._load_state()
+
+    def _load_state(self):
+        """
+        Read the tables back in the format of BookingManager.export_state.
+
+        Returns:
+        - The stored state, or None if nothing was stored yet.
+        """
+        if self.connection.execute("SELECT 1 FROM meta WHERE key = 'initialized'").fetchone() is None:
+            return None
+        return {
+            "bookings": [list(row) for row in self.connection.execute(
+                "SELECT passenger_id, passenger_name, flight_number, seat_number, seat_class FROM bookings ORDER BY id"
+            )],
+            "waitlists": [list(row) for row in self.connection.execute(
+                "SELECT seat_class, passenger_id, passenger_name, flight_number FROM waitlist ORDER BY seq"
+            )],
+            "flights": [
+                [flight_number, departure, arrival, weekdays, json.loads(seating_list)]
+                for flight_number, departure, arrival, weekdays, seating_list in self.connection.execute(
+                    "SELECT flight_number, departure, arrival, weekdays, seating_list FROM flights ORDER BY rowid"
+                )
+            ],
+        }
+
+    def transaction(self):
+        """
+        Return the lock a request holds while it changes the tables and commits.
+        """
+        return self._lock
+
+    def append(self, event, *args):
+        """
+        Apply a booking event to the tables. It is stored once commit() returns.
+
+        Args:
+        - event: The event name, see BookingManager._replay.
+        - args: The event arguments.
+        """
+        with self._lock:
+            execute = self.connection.execute
+            if event == "booked":
+                execute(DELETE_WAITLIST, (args[1], args[3]))
+                execute(INSERT_BOOKING, args[1:])
+            elif event == "waitlisted":
+                execute(INSERT_WAITLIST, args)
+            elif event == "booked_many":
+                # book_many only books and waitlists passengers without any booking or waitlist entry
+                booked, waitlisted = args
+                self.connection.executemany(INSERT_BOOKING, booked)
+                self.connection.executemany(INSERT_WAITLIST, waitlisted)
+            elif event == "removed":
+                execute(DELETE_BOOKING, args)
+                execute(DELETE_WAITLIST, args)
+            elif event == "reordered":
+                # The queue keeps its seq values, handed out again in the new order, so its place
+                # among the other waitlists stays the same. Negating them first avoids clashes.
+                flight_number, seat_class, passenger_ids = args
+                seqs, current = [], []
+                for seq, passenger_id in execute(SELECT_WAITLIST_SEQS, (flight_number, seat_class)):
+                    seqs.append(seq)
+                    current.append(passenger_id)
+                queued, listed = set(current), set(passenger_ids)
+                order = [passenger_id for passenger_id in passenger_ids if passenger_id in queued]
+                order += [passenger_id for passenger_id in current if passenger_id not in listed]
+                execute(NEGATE_WAITLIST_SEQS, (flight_number, seat_class))
+                self.connection.executemany(UPDATE_WAITLIST_SEQ, [
+                    (seq, passenger_id, flight_number) for seq, passenger_id in zip(seqs, order)
+                ])
+            elif event == "flight":
+                flight_number, departure, arrival, weekdays, seating_list = args
+                execute(INSERT_FLIGHT, (flight_number, departure, arrival, str(weekdays), json.dumps(seating_list)))
+            elif event == "flight_removed":
+                execute(DELETE_FLIGHT, args)
+            else:
+                raise ValueError(f"Unknown storage event: {event}")
+
+    def commit(self):
+        """
+        Commit the changes appended so far in one transaction.
+        """
+        with self._lock:
+            if self.connection.in_transaction:
+                self.connection.commit()
+                self.writes += 1
+
+    def checkpoint_due(self):
+        return False
+
+    def checkpoint(self, state):
+        """
+        Replace the contents of the tables with a full booking state.
+
+        Args:
+        - state: Booking state returned by BookingManager.export_state.
+        """
+        with self._lock, self.connection:
+            self.connection.execute("DELETE FROM bookings")
+            self.connection.execute("DELETE FROM waitlist")
+            self.connection.execute("DELETE FROM flights")
+            self.connection.executemany(INSERT_BOOKING, state["bookings"])
+            self.connection.executemany(INSERT_WAITLIST, state["waitlists"])
+            self.connection.executemany(INSERT_FLIGHT, [
+                (flight_number, departure, arrival, str(weekdays), json.dumps(seating_list))
+                for flight_number, departure, arrival, weekdays, seating_list in state.get("flights", [])
+            ])
+            self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('initialized', '1')")
+        self.writes += 1
+
+    def query(self, sql, parameters=()):
+        """
+        Run a read-only query against the tables.
+
+        Args:
+        - sql: The SQL statement.
+        - parameters: The statement parameters.
+
+        Returns:
+        - The list of result rows.
+        """
+        with self._lock:
+            return self.connection.execute(sql, parameters).fetchall()
+
+    def passenger_status(self, passenger_id):
+        """
+        Look up a passenger's bookings and waitlist positions with two indexed queries.
+
+        Args:
+        - passenger_id: The ID of the passenger (PassengerID).
+
+        Returns:
+        - A list of (flight_number, status, seat_class, seat_number or waitlist position) tuples,
+          bookings first.
+        """
+        with self._lock:
+            booked = self.connection.execute(SELECT_PASSENGER_BOOKINGS, (passenger_id,)).fetchall()
+            waitlisted = self.connection.execute(SELECT_PASSENGER_WAITLISTS, (passenger_id,)).fetchall()
+        return (
+            [(flight_number, "booked", seat_class, seat_number) for flight_number, seat_number, seat_class in booked]
+            + [(flight_number, "waitlisted", seat_class, position) for flight_number, seat_class, position in waitlisted]
+        )
+
+    def close(self):
+        self.commit()
+        self.connection.close()
@@ -1,8 +1,25 @@
+import os
+import random
+import shutil
+import sys
+import tempfile
 import unittest
+import threading
 from collections import deque
+from datetime import date
 from booking_manager_03 import BookingManager
+from cl.columnar import ReservationColumns
 from cl.graph import Graph
 from algorithms.searchers import FlightRedBlackTree, PassengerBST
+from algorithms.sorters import merge_sort, quick_sort, radix_sort
+from journal import Journal
+from records import SeatReservation
+from reload import DBReloader
+from snapshot import Snapshot, build_snapshot, load_airline_res_db, load_snapshot, snapshot_path_for
+from storage import SQLiteStorage
+from utils import LazyAirlineResDB, compile_row_decoder, format_time, iter_sections, parse_airline_res_db, parse_airline_res_dbs, parse_header
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "AirlineResDB.txt")
 
 
 class TestBookingManager(unittest.TestCase):
@@ -45,6 +62,18 @@ class TestBookingManager(unittest.TestCase):
         })
         flights_table.insert(["HA48", "HNL", "OAK", "Yes"])
 
+        # A second flight on the same route, used for re-accommodation
+        flights_graph.add_node("HA50", {
+            "departure": "HNL",
+            "arrival": "OAK",
+            "weekdays": "Yes",
+            "seating_list": {
+                "First": [1],
+                "Business": [3, 4],
+                "Economy": [5, 6]
+            }
+        })
+
         # Mock data for passengers
         confirmed_passengers_stack.append(["555-1234", "Clement", "HA48", "1F", "First"])
         confirmed_passengers_stack.append(["555-5678", "Sarah", "HA48", "3B", "Business"])
@@ -68,8 +97,8 @@ class TestBookingManager(unittest.TestCase):
         Test retrieving the waitlist for a flight.
         """
         # Add passengers to the waitlist
-        self.manager.waitlisted_passengers_queue["First"].append(["555-9876", "Ali", "HA48"])
-        self.manager.waitlisted_passengers_queue["Economy"].append(["555-8765", "Bob", "HA48"])
+        self.manager.add_to_waitlist(["555-9876", "Ali"], "HA48", "First")
+        self.manager.add_to_waitlist(["555-8765", "Bob"], "HA48", "Economy")
 
         waitlist = self.manager.get_waitlist("HA48")
         self.assertIn("First", waitlist)
@@ -84,7 +113,7 @@ class TestBookingManager(unittest.TestCase):
         Test removing a passenger from the waitlist.
         """
         # Add a passenger to the waitlist
-        self.manager.waitlisted_passengers_queue["Economy"].append(["555-8765", "Bob", "HA48"])
+        self.manager.add_to_waitlist(["555-8765", "Bob"], "HA48", "Economy")
 
         # Remove the passenger
         result = self.manager.remove_from_waitlist("555-8765", "HA48", "Economy")
@@ -96,21 +125,20 @@ class TestBookingManager(unittest.TestCase):
         Test managing the waitlist after a seat becomes available.
         """
         # Add a passenger to the waitlist
-        self.manager.waitlisted_passengers_queue["First"].append(["555-9876", "Ali", "HA48"])
+        self.manager.add_to_waitlist(["555-9876", "Ali"], "HA48", "First")
 
         # Verify the waitlist is not empty
         self.assertEqual(len(self.manager.waitlisted_passengers_queue["First"]), 1)
 
-        # Cancel a booking to free up a seat
+        # Cancel a booking to free up a seat; cancel_booking promotes the waitlisted passenger into it
         self.manager.cancel_booking("555-1234", "HA48")
 
-        # Manage the waitlist
-        messages = self.manager.manage_waitlist("HA48")
-
         # Verify the passenger was moved from the waitlist to confirmed bookings
-        self.assertEqual(len(messages), 1)
-        self.assertIn("Ali", messages[0])
         self.assertEqual(len(self.manager.waitlisted_passengers_queue["First"]), 0)
+        self.assertIn("booked on flight HA48", self.manager.get_passenger_status("555-9876"))
+
+        # Nobody is left to promote when the waitlist is managed again
+        self.assertEqual(self.manager.manage_waitlist("HA48"), [])
 
         # Verify the passenger is now in the confirmed bookings stack
         confirmed_passenger = next(
@@ -126,7 +154,7 @@ class TestBookingManager(unittest.TestCase):
         Test retrieving the status of a waitlisted passenger.
         """
         # Add a passenger to the waitlist
-        self.manager.waitlisted_passengers_queue["Economy"].append(["555-8765", "Bob", "HA48"])
+        self.manager.add_to_waitlist(["555-8765", "Bob"], "HA48", "Economy")
 
         status = self.manager.get_passenger_status("555-8765")
         self.assertIn("waitlisted for flight HA48", status)
@@ -140,6 +168,884 @@ class TestBookingManager(unittest.TestCase):
         self.assertIn("booked on flight HA48", status)
         self.assertIn("seat 1F in First class", status)
 
+    def test_passenger_index_tracks_bookings(self):
+        """
+        Test that the passenger index follows bookings, cancellations and waitlist changes.
+        """
+        self.assertTrue(self.manager.is_passenger_id_exists("555-1234"))
+        self.assertTrue(self.manager.is_passenger_booked_or_waitlisted("555-5678", "HA48"))
+
+        self.manager.book_passenger(["555-4321", "Dana"], "HA48", "Economy")
+        self.assertTrue(self.manager.is_passenger_booked_or_waitlisted("555-4321", "HA48"))
+        result = self.manager.book_passenger(["555-4321", "Dana"], "HA48", "Economy")
+        self.assertIn("already been booked", result)
+
+        self.manager.cancel_booking("555-4321", "HA48")
+        self.assertFalse(self.manager.is_passenger_id_exists("555-4321"))
+
+        self.manager.add_to_waitlist(["555-8765", "Bob"], "HA48", "Economy")
+        self.assertTrue(self.manager.is_passenger_id_exists("555-8765"))
+        self.manager.remove_from_waitlist("555-8765", "HA48", "Economy")
+        self.assertFalse(self.manager.is_passenger_id_exists("555-8765"))
+
+    def test_seat_inventory_allocation(self):
+        """
+        Test that seats are allocated in seating order and freed on cancellation.
+        """
+        self.assertEqual(self.manager.generate_seat_number("HA48", "Economy"), "5E")
+        self.manager.book_passenger(["555-0001", "Ann"], "HA48", "Economy")
+        self.manager.book_passenger(["555-0002", "Ben"], "HA48", "Economy")
+        self.assertFalse(self.manager.is_seat_number_available("HA48", "Economy"))
+
+        result = self.manager.book_passenger(["555-0003", "Cat"], "HA48", "Economy")
+        self.assertIn("added to the waitlist", result)
+
+        self.manager.cancel_booking("555-0001", "HA48")
+        status = self.manager.get_passenger_status("555-0003")
+        self.assertIn("seat 5E in Economy class", status)
+
+    def test_cancel_booking_keeps_stack_order(self):
+        """
+        Test that cancelling bookings leaves the remaining stack in booking order.
+        """
+        self.manager.book_passenger(["555-0001", "Ann"], "HA48", "Economy")
+        self.manager.book_passenger(["555-0002", "Ben"], "HA48", "Business")
+
+        self.assertTrue(self.manager.cancel_booking("555-5678", "HA48"))
+        self.assertTrue(self.manager.cancel_booking("555-0001", "HA48"))
+        self.assertFalse(self.manager.cancel_booking("555-0001", "HA48"))
+
+        remaining = [p[0] for p in self.manager.confirmed_passengers_stack]
+        self.assertEqual(remaining, ["555-1234", "555-0002"])
+
+    def test_waitlist_is_kept_per_flight(self):
+        """
+        Test that waitlists are kept per flight and sorting one flight leaves the others intact.
+        """
+        self.manager.add_to_waitlist(["555-0001", "Zoe"], "HA48", "First")
+        self.manager.add_to_waitlist(["555-0002", "Yan"], "UA560", "First")
+        self.manager.add_to_waitlist(["555-0003", "Abe"], "HA48", "First")
+
+        waitlist = self.manager.get_waitlist("HA48")
+        self.assertEqual([p["passenger_name"] for p in waitlist["First"]], ["Zoe", "Abe"])
+        self.assertEqual(waitlist["First"][1]["position"], 2)
+
+        self.manager.sort_waitlist("HA48", sort_by="Passenger Name")
+        self.assertEqual([p["passenger_name"] for p in self.manager.get_waitlist("HA48")["First"]], ["Abe", "Zoe"])
+        self.assertEqual(len(self.manager.get_waitlist("UA560")["First"]), 1)
+        self.assertEqual(len(self.manager.waitlisted_passengers_queue["First"]), 3)
+
+    def test_waitlist_position_after_removal(self):
+        """
+        Test that waitlist positions close up when a passenger is removed from the middle.
+        """
+        for i in range(5):
+            self.manager.add_to_waitlist([f"555-000{i}", f"P{i}"], "HA48", "Economy")
+
+        self.manager.remove_from_waitlist("555-0001", "HA48", "Economy")
+        self.manager.remove_from_waitlist("555-0003", "HA48", "Economy")
+
+        self.assertIn("position 2", self.manager.get_passenger_status("555-0002"))
+        self.assertIn("position 3", self.manager.get_passenger_status("555-0004"))
+        positions = [p["position"] for p in self.manager.get_waitlist("HA48")["Economy"]]
+        self.assertEqual(positions, [1, 2, 3])
+
+    def test_book_many(self):
+        """
+        Test booking a batch of passengers, including invalid IDs, duplicates and overflow.
+        """
+        results = self.manager.book_many([
+            (["555-0001", "Ann"], "HA48", "Economy"),
+            (["bad-id", "Ben"], "HA48", "Economy"),
+            (["555-0002", "Cat"], "HA48", "Economy"),
+            (["555-0001", "Ann"], "HA48", "First"),
+            (["555-0003", "Dan"], "HA48", "Economy"),
+        ])
+
+        self.assertIn("seat number 5E", results[0])
+        self.assertIn("must be in the format", results[1])
+        self.assertIn("seat number 6E", results[2])
+        self.assertIn("already been booked", results[3])
+        self.assertIn("added to the waitlist", results[4])
+        self.assertIn("position 1", self.manager.get_passenger_status("555-0003"))
+
+    def test_cancel_flight_rebooks_on_same_route(self):
+        """
+        Test cancelling a whole flight and re-accommodating its passengers on an alternative.
+        """
+        self.manager.book_passenger(["555-0001", "Ann"], "HA48", "First")
+        self.manager.add_to_waitlist(["555-0002", "Ben"], "HA48", "First")
+        self.assertEqual(self.manager.find_alternative_flights("HA48"), ["HA50"])
+
+        report = self.manager.cancel_flight("HA48", rebook_to=["HA50", "XX1"])
+
+        self.assertEqual(report["cancelled"], ["555-1234", "555-5678", "555-0001"])
+        self.assertEqual(report["removed_from_waitlist"], ["555-0002"])
+        self.assertEqual(report["skipped_flights"], ["XX1"])
+        self.assertIn(("555-1234", "HA50", "1F", "First"), report["rebooked"])
+        self.assertIn(("555-5678", "HA50", "3B", "Business"), report["rebooked"])
+        self.assertEqual(report["waitlisted"], [("555-0001", "HA50", "First"), ("555-0002", "HA50", "First")])
+        self.assertFalse(any(p[2] == "HA48" for p in self.manager.confirmed_passengers_stack))
+        self.assertEqual(self.manager.get_waitlist("HA48")["First"], [])
+
+    def test_cancel_flight_skips_flights_with_unknown_routes(self):
+        """
+        Test that flights whose routes are both unknown are not treated as alternatives of each other.
+        """
+        for flight_number in ["ZZ1", "ZZ2"]:
+            self.manager.upsert_flight(flight_number, "Unknown", "Unknown", "Yes", {"Economy": [1, 2]})
+        self.manager.book_passenger(["555-0001", "Ann"], "ZZ1", "Economy")
+
+        report = self.manager.cancel_flight("ZZ1", rebook_to=["ZZ2"])
+        self.assertEqual(report["skipped_flights"], ["ZZ2"])
+        self.assertEqual(report["rebooked"], [])
+        self.assertFalse(self.manager.is_passenger_booked_or_waitlisted("555-0001", "ZZ2"))
+
+    def test_cancel_flight_keeps_existing_booking_on_alternative(self):
+        """
+        Test that a passenger already booked on the alternative is not rebooked onto it a second time.
+        """
+        self.manager.add_booking(["555-1234", "Clement", "HA50", "4B", "Business"])
+        report = self.manager.cancel_flight("HA48", rebook_to=["HA50"])
+
+        self.assertEqual(report["already_on_alternative"], [("555-1234", "HA50")])
+        self.assertNotIn("555-1234", [rebooked[0] for rebooked in report["rebooked"]])
+        bookings = [p for p in self.manager.confirmed_passengers_stack if p[0] == "555-1234"]
+        self.assertEqual(len(bookings), 1)
+
+        self.manager.cancel_booking("555-1234", "HA50")
+        self.assertFalse(self.manager.is_passenger_booked_or_waitlisted("555-1234", "HA50"))
+        self.assertEqual(self.manager.seat_counts("HA50")[0]["Business"], 1)
+
+    def test_seat_counts_follow_bookings(self):
+        """
+        Test that the maintained seat counts match a recount of the bookings after each change.
+        """
+        def recount():
+            bookings = [p for p in self.manager.confirmed_passengers_stack if p[2] == "HA48"]
+            return {seat_class: sum(1 for p in bookings if p[4] == seat_class) for seat_class in ["First", "Business", "Economy"]}
+
+        self.manager.book_passenger(["555-0001", "Ann"], "HA48", "Economy")
+        self.assertEqual(self.manager.seat_counts("HA48"), (recount(), {"First": 1, "Business": 1, "Economy": 1}))
+        self.manager.cancel_booking("555-0001", "HA48")
+        self.manager.cancel_flight("HA48")
+        self.assertEqual(self.manager.seat_counts("HA48")[0], recount())
+        self.assertEqual(self.manager.seat_counts("XX1"), ({}, {}))
+
+    def test_render_cache_follows_flight_versions(self):
+        """
+        Test that cached flight info and rows are reused until a booking changes their flight.
+        """
+        info = self.manager.get_flight_info("HA48")
+        row = self.manager.get_flight_row("HA48")
+        self.assertIs(self.manager.get_flight_info("HA48"), info)
+        self.assertIs(self.manager.get_flight_row("HA48"), row)
+        self.assertEqual(self.manager.render_cache.hits, 2)
+
+        self.manager.book_passenger(["555-0001", "Ann"], "HA50", "Economy")
+        self.assertIs(self.manager.get_flight_info("HA48"), info)
+        self.manager.book_passenger(["555-0002", "Ben"], "HA48", "Economy")
+        self.assertIn("Passenger: Ben", self.manager.get_flight_info("HA48"))
+        self.assertEqual(self.manager.get_flight_row("HA48")["Booked Seats"]["Economy"], row["Booked Seats"]["Economy"] + 1)
+        self.assertEqual(self.manager.render_cache.stats(), {"hits": 3, "misses": 4, "entries": 2})
+
+    def test_reservation_columns_follow_bookings(self):
+        """
+        Test the columnar booked, available and load factor counts as bookings are added and cancelled.
+        """
+        columns = ReservationColumns(self.manager.confirmed_passengers_stack)
+        columns.add(["555-0001", "Ann", "HA48", "5E", "Economy"])
+        columns.add(["555-0002", "Ben", "HA50", "6E", "Economy"])
+        self.assertEqual(len(columns), 4)
+        self.assertEqual(columns.booked_counts()["HA48"], {"First": 1, "Business": 1, "Economy": 1})
+        self.assertTrue(columns.remove("555-0002", "HA50"))
+        self.assertFalse(columns.remove("555-0002", "HA50"))
+
+        capacities = {"HA48": {"First": 2, "Economy": 2}, "HA50": {"Economy": 1}, "HA51": {"First": 0}}
+        self.assertEqual(columns.occupancy(capacities), {
+            "HA48": {"First": (1, 1, 0.5), "Economy": (1, 1, 0.5)},
+            "HA50": {"Economy": (0, 1, 0.0)},
+            "HA51": {"First": (0, 0, 0.0)},
+        })
+
+        columns.COMPACTION_THRESHOLD = 0
+        columns.remove("555-1234", "HA48")
+        columns.remove("555-5678", "HA48")
+        self.assertEqual(len(columns.live), 1)
+        self.assertEqual(columns.booked_counts()["HA48"], {"First": 0, "Business": 0, "Economy": 1})
+        self.assertTrue(columns.remove("555-0001", "HA48"))
+
+    def test_occupancy_matches_seat_counts(self):
+        """
+        Test that the occupancy of every flight agrees with its seat counts and is cached until a booking changes.
+        """
+        def check():
+            occupancy = self.manager.occupancy()
+            self.assertEqual(set(occupancy), set(self.manager.flights_graph.nodes))
+            for flight_number in occupancy:
+                booked, available = self.manager.seat_counts(flight_number)
+                self.assertEqual(
+                    {seat_class: counts[:2] for seat_class, counts in occupancy[flight_number].items()},
+                    {seat_class: (booked[seat_class], available[seat_class]) for seat_class in booked}
+                )
+            return occupancy
+
+        occupancy = check()
+        self.assertIs(self.manager.occupancy(), occupancy)
+        self.manager.book_passenger(["555-0001", "Ann"], "HA48", "Economy")
+        self.assertEqual(check()["HA48"]["Economy"], (1, 1, 0.5))
+        self.manager.cancel_booking("555-1234", "HA48")
+        self.manager.upsert_flight("ZZ1", "SCK", "IWA", "Yes", {"Economy": [1, 2]})
+        self.assertEqual(check()["ZZ1"], {"Economy": (0, 2, 0.0)})
+
+    def test_sort_by_seat_class_keeps_booking_order(self):
+        """
+        Test that sorting confirmed passengers by seat class keeps each class in booking order.
+        """
+        # More bookings than quick_sort insertion sorts, so they are partitioned
+        for i in range(40):
+            seat_class = self.manager.seat_classes[i * 7 % 3]
+            self.manager.add_booking([f"555-00{i:02d}", f"P{i}", "HA50", f"{i}A", seat_class])
+        expected = sorted(self.manager.confirmed_passengers_stack, key=lambda x: x[4])
+        self.manager.sort_confirmed_passengers("Seat Class")
+        self.assertEqual(self.manager.confirmed_passengers_stack, expected)
+
+
+class TestLegInstanceIndex(unittest.TestCase):
+    def setUp(self):
+        self.manager = BookingManager.from_airline_res_db(parse_airline_res_db(DB_PATH))
+
+    def test_flight_info_lists_every_leg_and_date(self):
+        """
+        Test that flight info covers multi-leg flights and flights flown on several dates.
+        """
+        info = self.manager.get_flight_info("WN380")
+        self.assertIn("Leg 1 on 2018-08-05: Midway (MDW) -> Ontario-International (ONT)", info)
+        self.assertIn("Leg 2 on 2018-08-05: Ontario-International (ONT) -> Sacramento-International (SMF)", info)
+        info = self.manager.get_flight_info("G4155")
+        self.assertLess(info.index("Leg 1 on 2018-01-28"), info.index("Leg 1 on 2018-01-31"))
+
+        info = self.manager.get_flight_info("G4155", date(2018, 1, 31))
+        self.assertNotIn("2018-01-28", info)
+        self.assertIn("Number of Available Seats: 16", info)
+
+    def test_index_follows_leg_instance_updates(self):
+        """
+        Test that added and removed leg instances are found by key and by date.
+        """
+        legs = self.manager.leg_instances
+        first = legs.get("G4155", 1, date(2018, 1, 28))
+        self.assertEqual(first.Number_of_available_seats, 3)
+        added = first._replace(Date=date(2018, 1, 30))
+        self.manager.update_leg_instances([added], [first])
+        self.assertIsNone(legs.get("G4155", 1, date(2018, 1, 28)))
+        self.assertEqual([leg.Date for leg in legs.for_flight("G4155")], [date(2018, 1, 30), date(2018, 1, 31)])
+        self.assertEqual(legs.for_flight("G4155", date(2018, 1, 30)), [added])
+
+
+class TestBookingManagerThreadSafety(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a thread-safe BookingManager with a handful of small flights.
+        """
+        flights_graph = Graph()
+        for flight_number in ["F1", "F2", "F3", "F4"]:
+            flights_graph.add_node(flight_number, {
+                "departure": "SFO",
+                "arrival": "JFK",
+                "weekdays": "Yes",
+                "seating_list": {
+                    "First": list(range(1, 6)),
+                    "Business": list(range(6, 16)),
+                    "Economy": list(range(16, 36))
+                }
+            })
+        self.manager = BookingManager(
+            flights_graph, Graph(), FlightRedBlackTree(), PassengerBST(), [], [], None,
+            airport_data={}, flight_data={}, leg_instance_data=[], thread_safe=True
+        )
+
+    def test_concurrent_bookings_do_not_share_seats(self):
+        """
+        Test that many threads booking and cancelling at once never hand one seat to two passengers.
+        """
+        def worker(worker_id):
+            for i in range(100):
+                passenger_id = f"555-{worker_id}{i:03d}"
+                flight_number = f"F{i % 4 + 1}"
+                self.manager.book_passenger([passenger_id, f"P{worker_id}-{i}"], flight_number, "Economy")
+                if i % 3 == 0:
+                    self.manager.cancel_booking(passenger_id, flight_number)
+
+        threads = [threading.Thread(target=worker, args=(worker_id,)) for worker_id in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        booked = self.manager.confirmed_passengers_stack
+        seats = [(p[2], p[3]) for p in booked]
+        self.assertEqual(len(seats), len(set(seats)))
+        for flight_number in ["F1", "F2", "F3", "F4"]:
+            self.assertEqual(sum(1 for p in booked if p[2] == flight_number), 20)
+        passenger_ids = [p[0] for p in booked]
+        self.assertEqual(len(passenger_ids), len(set(passenger_ids)))
+
+
+    def test_views_can_be_read_while_booking(self):
+        """
+        Test that the confirmed stack and waitlist views can be read while other threads add waitlists.
+        """
+        errors = []
+        done = threading.Event()
+        # Switch threads often, so that reads overlap with the creation of new waitlists
+        self.addCleanup(sys.setswitchinterval, sys.getswitchinterval())
+        sys.setswitchinterval(1e-5)
+
+        def writer(worker_id):
+            for i in range(150):
+                flight_number = f"W{worker_id}-{i}"
+                self.manager.upsert_flight(flight_number, "SFO", "JFK", "Yes", {"First": [1], "Business": [], "Economy": []})
+                for passenger in range(2):
+                    self.manager.book_passenger([f"555-{worker_id * 2000 + passenger * 1000 + i:04d}", "P"], flight_number, "First")
+
+        def reader():
+            while not done.is_set():
+                try:
+                    self.manager.waitlisted_passengers_queue
+                    self.manager.confirmed_passengers_stack
+                except RuntimeError as error:
+                    errors.append(error)
+                    return
+
+        threads = [threading.Thread(target=writer, args=(worker_id,)) for worker_id in range(4)]
+        readers = [threading.Thread(target=reader) for _ in range(2)]
+        for thread in threads + readers:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        done.set()
+        for thread in readers:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.manager.waitlisted_passengers_queue["First"]), 4 * 150)
+
+
+class TestDBReloader(unittest.TestCase):
+    def setUp(self):
+        """
+        Build a manager from a copy of the DB file that the tests can edit.
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directory.name, "AirlineResDB.txt")
+        shutil.copy(DB_PATH, self.db_path)
+        self.manager = BookingManager.from_airline_res_db(parse_airline_res_db(self.db_path))
+        self.reloader = DBReloader(self.manager, self.db_path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def edit_db(self, *replacements):
+        with open(self.db_path) as file:
+            text = file.read()
+        for old, new in replacements:
+            self.assertIn(old, text)
+            text = text.replace(old, new)
+        with open(self.db_path, "w") as file:
+            file.write(text)
+
+    def test_reload_applies_only_changed_rows(self):
+        """
+        Test that a reload applies added and removed rows and keeps bookings made in the meantime.
+        """
+        self.manager.book_passenger(["555-9001", "Ann"], "HA48", "Economy")
+        self.edit_db(
+            ("\tWN380, Southwest, Yes\n", "\tWN380, Southwest, Yes\n\tZZ1, Test Air, No\n"),
+            ("\tB6624, 1, LAX, 915PM, JFK, 522AM\n", "\tB6624, 1, LAX, 915PM, JFK, 522AM\n\tZZ1, 1, HNL, 100PM, OAK, 900PM\n"),
+            ("\tG4155, 1, 2018-01-28, 2A, Deana, 867-5309\n", "\tZZ1, 1, 2018-02-01, 3A, Zed, 555-9002\n"),
+        )
+
+        deltas = self.reloader.reload()
+        self.assertEqual(set(deltas), {"Flight", "Flight_leg", "Seat_reservation"})
+        self.assertEqual([row.Flight_number for row in deltas["Flight"][0]], ["ZZ1"])
+        self.assertEqual(deltas["Flight"][1], [])
+
+        self.assertEqual(self.manager.flights_table.search_by_flight_number("ZZ1")[0][1:3], ["HNL", "OAK"])
+        self.assertIn("ZZ1", self.manager.find_alternative_flights("HA48"))
+        self.assertTrue(self.manager.is_passenger_booked_or_waitlisted("555-9002", "ZZ1"))
+        self.assertFalse(self.manager.is_passenger_id_exists("867-5309"))
+        self.assertTrue(self.manager.is_passenger_booked_or_waitlisted("555-9001", "HA48"))
+        self.assertEqual(self.reloader.reload(), {})
+
+    def test_reload_moves_edited_reservation_without_overbooking(self):
+        """
+        Test that editing the seat of a reservation on a full class moves the booking and promotes nobody.
+        """
+        i = 0
+        while self.manager.seat_counts("WN380")[1]["Economy"] > 0:
+            self.manager.book_passenger([f"555-90{i:02d}", f"P{i}"], "WN380", "Economy")
+            i += 1
+        self.manager.book_passenger(["555-9100", "Wendy"], "WN380", "Economy")
+        self.edit_db(("\tWN380, 1, 2018-08-05, 7C, Tom, 555-0031\n", "\tWN380, 1, 2018-08-05, 7D, Tom, 555-0031\n"))
+
+        self.reloader.reload()
+        self.assertEqual(self.manager.seat_counts("WN380")[1]["Economy"], 0)
+        self.assertEqual(self.manager.flight_bookings["WN380"]["555-0031"][3], "7D")
+        self.assertEqual(self.manager.passenger_index["555-9100"]["WN380"][0], "waitlisted")
+
+    def test_reload_removes_flights(self):
+        """
+        Test that removing a flight from the file drops it from the graph, table and stack.
+        """
+        self.edit_db(("\tUA560, United, Yes\n", ""))
+        self.reloader.reload()
+        self.assertIsNone(self.manager.flights_graph.get_node("UA560"))
+        self.assertEqual(self.manager.flights_table.search_by_flight_number("UA560"), [])
+        self.assertNotIn("UA560", [flight[0] for flight in self.manager.flights_stack])
+
+
+    def test_reload_keeps_route_when_legs_change(self):
+        """
+        Test that editing any leg keeps the route from the first leg's departure to the last leg's arrival.
+        """
+        self.assertEqual(self.manager.flights_table.search_by_flight_number("WN380")[0][1:3], ["MDW", "SMF"])
+        self.edit_db(("\tWN380, 2, ONT, 1045AM, SMF, 1145AM\n", "\tWN380, 2, ONT, 1050AM, SMF, 1150AM\n"))
+        self.reloader.reload()
+        self.assertEqual(self.manager.flights_table.search_by_flight_number("WN380")[0][1:3], ["MDW", "SMF"])
+
+        self.edit_db(("\tWN380, 1, MDW, 755AM, ONT, 1010AM\n", "\tWN380, 1, MDW, 800AM, ONT, 1015AM\n"))
+        self.reloader.reload()
+        self.assertEqual(self.manager.flights_table.search_by_flight_number("WN380")[0][1:3], ["MDW", "SMF"])
+        self.assertEqual(self.manager.routes["WN380"], ("MDW", "SMF"))
+
+
+class TestJournal(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.journal_path = os.path.join(self.directory.name, "AirlineResDB.journal")
+        self.db = parse_airline_res_db(DB_PATH)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def open_manager(self, **journal_options):
+        manager = BookingManager.from_airline_res_db(self.db)
+        manager.attach_storage(Journal(self.journal_path, **journal_options))
+        return manager
+
+    def make_changes(self, manager):
+        manager.book_passenger(["555-9001", "Ann"], "HA48", "First")
+        for i in range(5):
+            manager.book_passenger([f"555-91{i:02d}", f"P{i}"], "HA48", "First")
+        manager.add_to_waitlist(["555-9201", "Zed"], "HA48", "Economy")
+        manager.add_to_waitlist(["555-9202", "Amy"], "HA48", "Economy")
+        manager.sort_waitlist("HA48")
+        manager.cancel_booking("555-9001", "HA48")
+        manager.remove_from_waitlist("555-9201", "HA48", "Economy")
+
+    def test_replay_restores_bookings_and_waitlists(self):
+        """
+        Test that a new manager attached to the journal ends up with the same bookings and waitlists.
+        """
+        manager = self.open_manager()
+        self.make_changes(manager)
+        expected = manager.export_state()
+        manager.storage.close()
+
+        restored = self.open_manager()
+        self.assertEqual(restored.export_state(), expected)
+        for passenger_id in ["555-9001", "555-9100", "555-9104", "555-9202"]:
+            self.assertEqual(restored.get_passenger_status(passenger_id), manager.get_passenger_status(passenger_id))
+        self.assertEqual(restored.generate_seat_number("HA48", "First"), manager.generate_seat_number("HA48", "First"))
+
+    def test_checkpoint_bounds_replay(self):
+        """
+        Test that checkpoints empty the journal and are restored before the remaining records.
+        """
+        manager = self.open_manager(checkpoint_every=4)
+        self.make_changes(manager)
+        expected = manager.export_state()
+        manager.storage.close()
+
+        self.assertTrue(os.path.exists(self.journal_path + ".checkpoint"))
+        restored = self.open_manager(checkpoint_every=4)
+        self.assertLess(len(restored.storage.records), 4)
+        self.assertEqual(restored.export_state(), expected)
+
+    def test_checkpoint_restores_flight_changes(self):
+        """
+        Test that flights changed before a checkpoint keep their changes after a restart.
+        """
+        manager = self.open_manager()
+        manager.upsert_flight("UA560", "LAX", "JFK", "Yes", {})
+        manager.upsert_flight("ZZ1", "SCK", "IWA", "Yes", {"Economy": [1, 2]})
+        manager.remove_flight("HA48")
+        manager.checkpoint()
+        manager.storage.close()
+
+        restored = self.open_manager()
+        self.assertEqual(restored.storage.records, [])
+        self.assertEqual(restored.flights_table.search_by_flight_number("UA560")[0][1:3], ["LAX", "JFK"])
+        self.assertEqual(restored.seat_counts("ZZ1")[1], {"Economy": 2})
+        self.assertIsNone(restored.flights_graph.get_node("HA48"))
+        self.assertEqual(restored.export_state()["flights"], manager.export_state()["flights"])
+
+    def test_book_many_writes_one_record(self):
+        """
+        Test that a batch booking is journaled as one record and replayed into the same bookings and waitlists.
+        """
+        manager = self.open_manager()
+        records = len(manager.storage.records)
+        results = manager.book_many(
+            [([f"555-93{i:02d}", f"P{i}"], "HA48", "Economy") for i in range(19)]
+            + [(["555-0009", "Clement"], "HA50", "First"), (["555-9400", "Eve"], "HA50", "First")]
+        )
+        self.assertIn("seat number 33E", results[17])
+        self.assertIn("added to the waitlist", results[18])
+        self.assertIn("already been booked", results[19])
+        expected = manager.export_state()
+        manager.storage.close()
+
+        restored = self.open_manager()
+        self.assertEqual(len(restored.storage.records) - records, 1)
+        self.assertEqual(restored.storage.records[-1]["event"], "booked_many")
+        self.assertEqual(restored.export_state(), expected)
+        self.assertIn("position 1", restored.get_passenger_status("555-9318"))
+        self.assertEqual(restored.generate_seat_number("HA48", "First"), manager.generate_seat_number("HA48", "First"))
+
+    def test_torn_record_is_dropped(self):
+        """
+        Test that a record cut short by a crash is ignored and truncated on the next start.
+        """
+        manager = self.open_manager()
+        manager.book_passenger(["555-9001", "Ann"], "HA48", "First")
+        manager.storage.close()
+        with open(self.journal_path, "a") as file:
+            file.write('{"seq": 99, "event": "boo')
+
+        restored = self.open_manager()
+        self.assertTrue(restored.is_passenger_booked_or_waitlisted("555-9001", "HA48"))
+        with open(self.journal_path) as file:
+            self.assertTrue(file.read().endswith("\n"))
+
+
+class TestSQLiteStorage(unittest.TestCase):
+    make_changes = TestJournal.make_changes
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.storage_path = os.path.join(self.directory.name, "AirlineResDB.sqlite3")
+        self.db = parse_airline_res_db(DB_PATH)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def open_manager(self):
+        manager = BookingManager.from_airline_res_db(self.db)
+        manager.attach_storage(SQLiteStorage(self.storage_path, sync=False))
+        return manager
+
+    def test_tables_follow_the_manager(self):
+        """
+        Test that the tables hold the same bookings and waitlists as the manager, one transaction per request.
+        """
+        manager = self.open_manager()
+        writes = manager.storage.writes
+        self.make_changes(manager)
+        self.assertEqual(manager.storage.writes - writes, 10)
+        self.assertEqual(manager.storage._load_state(), manager.export_state())
+        for passenger_id in ["555-9001", "555-9100", "555-9104", "555-9202"]:
+            expected = [
+                (flight_number, status, seat_class)
+                for flight_number, (status, seat_class, _) in manager.passenger_index.get(passenger_id, {}).items()
+            ]
+            stored = [status[:3] for status in manager.storage.passenger_status(passenger_id)]
+            self.assertEqual(stored, expected)
+            for flight_number, status, seat_class, position in manager.storage.passenger_status(passenger_id):
+                if status == "waitlisted":
+                    self.assertIn(f"at position {position}.", manager.get_passenger_status(passenger_id))
+        self.assertEqual(manager.storage.query("SELECT COUNT(*) FROM bookings WHERE flight_number = ?", ("HA48",)), [(len(manager.flight_bookings["HA48"]),)])
+
+    def test_reopen_restores_bookings_and_flights(self):
+        """
+        Test that a new manager attached to the database ends up with the same bookings, and that flight changes are stored.
+        """
+        manager = self.open_manager()
+        self.make_changes(manager)
+        manager.upsert_flight("ZZ1", "SCK", "IWA", "Yes", {"Economy": [1, 2]})
+        manager.remove_flight("HA48")
+        expected = manager.export_state()
+        manager.storage.close()
+
+        restored = self.open_manager()
+        self.assertEqual(restored.export_state()["bookings"], expected["bookings"])
+        self.assertEqual(restored.export_state()["waitlists"], expected["waitlists"])
+        flights = restored.storage.query("SELECT flight_number FROM flights WHERE flight_number IN ('ZZ1', 'HA48')")
+        self.assertEqual(flights, [("ZZ1",)])
+        self.assertEqual(restored.seat_counts("ZZ1")[1], {"Economy": 2})
+        self.assertIsNone(restored.flights_graph.get_node("HA48"))
+
+    def test_book_many_is_one_transaction(self):
+        """
+        Test that a batch booking is stored in one transaction and its waitlist keeps request order.
+        """
+        manager = self.open_manager()
+        writes = manager.storage.writes
+        manager.book_many([([f"555-93{i:02d}", f"P{i}"], "HA48", "Economy") for i in range(21)])
+        self.assertEqual(manager.storage.writes - writes, 1)
+        self.assertEqual(manager.storage._load_state(), manager.export_state())
+        manager.storage.close()
+
+        restored = self.open_manager()
+        waitlist = [passenger["passenger_id"] for passenger in restored.get_waitlist("HA48")["Economy"]]
+        self.assertEqual(waitlist, ["555-9318", "555-9319", "555-9320"])
+
+    def test_reopen_restores_flight_airports(self):
+        """
+        Test that airports entered for a flight (as the app does for "Unknown" ones) survive a restart.
+        """
+        manager = self.open_manager()
+        manager.upsert_flight("UA560", "LAX", "JFK", "Yes", {})
+        manager.storage.close()
+
+        restored = self.open_manager()
+        self.assertEqual(restored.flights_table.search_by_flight_number("UA560")[0][1:3], ["LAX", "JFK"])
+        self.assertEqual(restored.get_flight_row("UA560")["Departure"], manager.get_flight_row("UA560")["Departure"])
+
+    def test_reorder_keeps_waitlist_seqs(self):
+        """
+        Test that sorting a waitlist reuses its rows' seq values, so waitlists of other flights keep their place.
+        """
+        manager = self.open_manager()
+        manager.add_to_waitlist(["555-9201", "Zed"], "HA48", "Economy")
+        manager.add_to_waitlist(["555-9203", "Bob"], "WN380", "Economy")
+        manager.add_to_waitlist(["555-9202", "Amy"], "HA48", "Economy")
+        query = "SELECT seq, passenger_id FROM waitlist ORDER BY seq"
+        seqs = [seq for seq, _ in manager.storage.query(query)]
+
+        manager.sort_waitlist("HA48")
+        self.assertEqual(manager.storage.query(query), list(zip(seqs, ["555-9202", "555-9203", "555-9201"])))
+        self.assertEqual(manager.storage._load_state()["waitlists"], manager.export_state()["waitlists"])
+
+    def test_requests_commit_only_their_own_changes(self):
+        """
+        Test that a request waits for the open transaction of another, instead of committing its changes.
+        """
+        manager = self.open_manager()
+        storage = manager.storage
+        reader = SQLiteStorage(self.storage_path)
+        self.addCleanup(reader.close)
+        started, release = threading.Event(), threading.Event()
+
+        def slow_request():
+            with storage.transaction():
+                storage.append("waitlisted", "Economy", "555-9201", "Zed", "HA48")
+                started.set()
+                release.wait(5)
+                storage.commit()
+
+        slow = threading.Thread(target=slow_request)
+        slow.start()
+        self.assertTrue(started.wait(5))
+        booking = threading.Thread(target=manager.book_passenger, args=(["555-9001", "Ann"], "HA48", "First"))
+        booking.start()
+        booking.join(0.2)
+        self.assertTrue(booking.is_alive())
+        self.assertEqual(reader.query("SELECT passenger_id FROM waitlist WHERE passenger_id = '555-9201'"), [])
+
+        release.set()
+        slow.join()
+        booking.join()
+        self.assertEqual(reader.query("SELECT passenger_id FROM waitlist WHERE passenger_id = '555-9201'"), [("555-9201",)])
+        self.assertEqual([status[0] for status in reader.passenger_status("555-9001")], ["HA48"])
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directory.name, "AirlineResDB.txt")
+        shutil.copy(DB_PATH, self.db_path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip_matches_text_parse(self):
+        """
+        Test that a snapshot loads the same typed records as parsing the text file.
+        """
+        snapshot_path = build_snapshot(self.db_path)
+        self.assertEqual(load_snapshot(snapshot_path), parse_airline_res_db(self.db_path))
+        with Snapshot(snapshot_path) as snapshot:
+            self.assertEqual(snapshot["Leg_instance"][0].Date, date(2018, 1, 28))
+        self.assertTrue(snapshot.buffer.closed)
+        self.assertTrue(snapshot.file.closed)
+
+    def test_round_trip_keeps_missing_values(self):
+        """
+        Test that values missing from short rows come back as None, whatever the column type.
+        """
+        with open(self.db_path, "w") as file:
+            file.write(
+                "Leg_instance = {\n"
+                "\tFlight_number, Leg_number, Date:date, Number_of_available_seats, Airplane_id\n"
+                "\tHA48, 1, 2018-01-28, 3, 28\n"
+                "\tHA48, 2\n"
+                "}\n"
+            )
+        records = load_snapshot(build_snapshot(self.db_path))["Leg_instance"]
+        self.assertEqual(records, parse_airline_res_db(self.db_path)["Leg_instance"])
+        self.assertEqual(records[1][:3], ("HA48", 2, None))
+
+    def test_stale_snapshot_is_ignored(self):
+        """
+        Test that the snapshot is only used while it is at least as new as the text file.
+        """
+        build_snapshot(self.db_path)
+        self.assertIsInstance(load_airline_res_db(self.db_path), dict)
+        snapshot_time = os.path.getmtime(snapshot_path_for(self.db_path))
+        os.utime(self.db_path, (snapshot_time + 10, snapshot_time + 10))
+        self.assertIsInstance(load_airline_res_db(self.db_path), LazyAirlineResDB)
+
+
+class TestAirlineResDBParser(unittest.TestCase):
+    def test_iter_sections_streams_requested_sections(self):
+        """
+        Test that iter_sections only yields the requested sections, matching the full parse.
+        """
+        records = list(iter_sections(DB_PATH, sections={"Flight", "Fare"}))
+        self.assertEqual({section for section, _ in records}, {"Flight", "Fare"})
+
+        data = parse_airline_res_db(DB_PATH)
+        self.assertEqual([record for section, record in records if section == "Flight"], data["Flight"])
+
+    def test_header_row_drives_field_names_and_types(self):
+        """
+        Test that section headers name the fields and that typed columns are converted up front.
+        """
+        data = parse_airline_res_db(DB_PATH)
+        self.assertNotIn("Airport_code", [airport.Airport_code for airport in data["Airport"]])
+
+        reservation = data["Seat_reservation"][0]
+        self.assertEqual(reservation.PassengerID, "555-55-5555")
+        self.assertEqual(reservation.Date, date(2018, 1, 28))
+
+        leg = data["Leg_instance"][0]
+        self.assertEqual(leg.Number_of_available_seats, 3)
+        self.assertEqual(leg.Departure_time, 17 * 60 + 35)
+        self.assertEqual(format_time(leg.Departure_time), "535PM")
+
+    def test_rows_are_compact_records(self):
+        """
+        Test that known sections decode into their slotted record types and others into a
+        namedtuple built from the section header.
+        """
+        data = parse_airline_res_db(DB_PATH)
+        reservation = data["Seat_reservation"][0]
+        self.assertIsInstance(reservation, SeatReservation)
+        self.assertFalse(hasattr(reservation, "__dict__"))
+
+        decode = compile_row_decoder("Crew", parse_header("Crew_id, Name, Flights:int"))
+        crew = decode(["C1", "Ada", "3"])
+        self.assertEqual((crew.Crew_id, crew.Name, crew.Flights), ("C1", "Ada", 3))
+        self.assertIsNone(decode(["C2"]).Name)
+
+    def test_lazy_db_parses_sections_on_first_access(self):
+        """
+        Test that the lazy DB lists every section up front but only parses the ones accessed.
+        """
+        data = parse_airline_res_db(DB_PATH)
+        lazy = LazyAirlineResDB(DB_PATH)
+        self.assertEqual(list(lazy), list(data))
+        self.assertEqual(lazy.sections, {})
+
+        self.assertEqual(lazy["Flight_leg"], data["Flight_leg"])
+        self.assertEqual(list(lazy.sections), ["Flight_leg"])
+        self.assertIs(lazy["Flight_leg"], lazy.sections["Flight_leg"])
+        self.assertEqual(dict(lazy), data)
+
+    def test_parse_sharded_files(self):
+        """
+        Test that sharded DB files merge in path order, in a process pool or not, and that rows repeated
+        across files are rejected.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "AirlineResDB-2.txt"), "w") as file:
+                file.write("Airport = {\n\tAirport_code, Name, City, State\n\tZZZ, Test Field, Nowhere, NA\n}\n"
+                           "Crew = {\n\tCrew_id, Name\n\tC1, Ada\n}\n")
+            shutil.copy(DB_PATH, os.path.join(directory, "AirlineResDB-1.txt"))
+            pattern = os.path.join(directory, "AirlineResDB-*.txt")
+
+            data = parse_airline_res_dbs(pattern, max_workers=2, min_parallel_bytes=0)
+            single = parse_airline_res_db(DB_PATH)
+            self.assertEqual(data["Airport"][:-1], single["Airport"])
+            self.assertEqual(data["Airport"][-1].Airport_code, "ZZZ")
+            self.assertEqual(data["Crew"][0].Name, "Ada")
+            self.assertEqual(data["Crew"][0]._fields, ("Crew_id", "Name"))
+            self.assertEqual(parse_airline_res_dbs(pattern, max_workers=1), data)
+            self.assertEqual(parse_airline_res_dbs(pattern, max_workers=2), data)
+
+            shutil.copy(DB_PATH, os.path.join(directory, "AirlineResDB-3.txt"))
+            with self.assertRaises(ValueError):
+                parse_airline_res_dbs(pattern)
+
+
+
+class TestSorters(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(7)
+        # Few distinct keys, so stability is visible, and long presorted stretches for galloping
+        self.samples = [
+            [(rng.randint(0, 20), i) for i in range(size)] for size in (0, 1, 2, 63, 64, 65, 500, 3000)
+        ]
+        self.samples.append([(i // 100 if i < 1500 else i % 7, i) for i in range(3000)])
+        self.samples.append([(-i, i) for i in range(1000)])
+
+    def test_merge_sort_is_stable_and_sorts_in_place(self):
+        """
+        Test that merge_sort matches the built-in stable sort and sorts the list it is given.
+        """
+        for sample in self.samples:
+            objects = list(sample)
+            self.assertIs(merge_sort(objects, key=lambda x: x[0]), objects)
+            self.assertEqual(objects, sorted(sample, key=lambda x: x[0]))
+
+    def test_merge_sort_computes_each_key_once(self):
+        """
+        Test that merge_sort calls the key function once per object.
+        """
+        calls = []
+        merge_sort(list(self.samples[6]), key=lambda x: calls.append(x) or x[0])
+        self.assertEqual(len(calls), len(self.samples[6]))
+
+    def test_quick_sort_sorts_in_place(self):
+        """
+        Test that quick_sort orders every sample by key, keeping the same objects.
+        """
+        for sample in self.samples:
+            objects = list(sample)
+            self.assertIs(quick_sort(objects, key=lambda x: x[0]), objects)
+            self.assertEqual([x[0] for x in objects], sorted(x[0] for x in sample))
+            self.assertEqual(sorted(objects), sorted(sample))
+
+    def test_quick_sort_handles_adversarial_input(self):
+        """
+        Test inputs that sent the recursive quick sort O(n) levels deep (e.g., organ pipes).
+        """
+        size = 20000
+        for objects in [[min(i, size - i) for i in range(size)], list(range(size)), [i % 3 for i in range(size)]]:
+            expected = sorted(objects)
+            self.assertEqual(quick_sort(objects), expected)
+
+    def test_radix_sort_is_stable_for_unicode_keys(self):
+        """
+        Test that radix_sort orders any Unicode strings like Python does, keeping equal keys in order.
+        """
+        rng = random.Random(7)
+        for alphabet in ["ab", "HAUW0123456789", "aéżŁ日本\U0001F600"]:
+            for size in (0, 1, 70, 3000):
+                objects = [("".join(rng.choice(alphabet) for _ in range(rng.randint(0, 6))), i) for i in range(size)]
+                self.assertEqual(radix_sort(objects, lambda x: x[0]), sorted(objects, key=lambda x: x[0]))
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -1,107 +1,350 @@
+import gc
+import glob
+import mmap
+import os
 import re
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from functools import lru_cache, partial
+from operator import attrgetter
+from records import SECTION_KEYS, record_type
+
+# Below this total file size, parse_airline_res_dbs parses in this process: starting workers and
+# sending the records back costs more than parsing small files
+PARALLEL_PARSE_MIN_BYTES = 16 * 1024 * 1024
+
+SECTION_HEADER = re.compile(r"(\w+)\s*=\s*{")
+# The same header and closing brace lines, found directly in the raw bytes of a file
+SECTION_HEADER_LINE = re.compile(rb"^[ \t]*(\w+)[ \t]*=[ \t]*{[^\n]*\n?", re.MULTILINE)
+SECTION_END_LINE = re.compile(rb"^[ \t]*}[ \t]*\r?$", re.MULTILINE)
+
+# Column types used when a section header does not annotate the column itself (e.g., "Date:date")
+COLUMN_TYPES = {
+    "Leg_number": "int",
+    "Number_of_available_seats": "int",
+    "Amount": "int",
+    "Max_seats": "int",
+    "Total_number_of_seats": "int",
+    "Date": "date",
+    "Departure_time": "time",
+    "Arrival_time": "time",
+    "Scheduled_departure_time": "time",
+    "Scheduled_arrival_time": "time",
+}
+
+
+def parse_time(value):
+    """
+    Convert a time such as "531PM" or "1205AM" into minutes since midnight.
+    """
+    suffix = value[-2:].upper()
+    digits = value[:-2]
+    if suffix not in ("AM", "PM") or len(digits) < 3 or not digits.isdigit():
+        raise ValueError(f"Invalid time: {value!r}")
+    hours, minutes = int(digits[:-2]), int(digits[-2:])
+    return (hours % 12 + (12 if suffix == "PM" else 0)) * 60 + minutes
+
+
+def format_time(minutes):
+    """
+    Convert minutes since midnight back into the DB's time format (e.g., 1051 -> "531PM").
+    Values that are not minutes (e.g., "Unknown") are returned unchanged.
+    """
+    if not isinstance(minutes, int):
+        return minutes
+    hours, minutes = divmod(minutes, 60)
+    return f"{(hours - 1) % 12 + 1}{minutes:02d}{'PM' if hours >= 12 else 'AM'}"
+
+
+CONVERTERS = {
+    "str": None,
+    "int": int,
+    "date": date.fromisoformat,
+    "time": parse_time,
+}
+
+
+def parse_header(line):
+    """
+    Split a section header row into (field_name, type_name) pairs.
+    Fields may carry a type annotation (e.g., "Date:date"); otherwise COLUMN_TYPES or str is used.
+    """
+    columns = []
+    for column in line.split(", "):
+        name, _, type_name = column.strip().partition(":")
+        type_name = type_name or COLUMN_TYPES.get(name, "str")
+        if type_name not in CONVERTERS:
+            raise ValueError(f"Unknown type {type_name!r} for field {name!r}.")
+        columns.append((name, type_name))
+    return tuple(columns)
+
+
+@lru_cache(maxsize=None)
+def compile_row_decoder(section, columns):
+    """
+    Compile a function that turns a row's list of string values into a typed record.
+
+    Args:
+    - section: Name of the section the rows belong to, used to pick its record type (see records.py).
+    - columns: Tuple of (field_name, type_name) pairs, as returned by parse_header.
+
+    Returns:
+    - A function taking the list of values of one row. Fields past the end of a short row are None.
+    """
+    namespace = {name: converter for name, converter in CONVERTERS.items() if converter}
+    namespace["record"] = record_type(section, [name for name, _ in columns])
+    values = []
+    for index, (name, type_name) in enumerate(columns):
+        values.append(f"values[{index}]" if type_name == "str" else f"{type_name}(values[{index}])")
+    source = (
+        "def decode(values):\n"
+        f"    if len(values) < {len(columns)}:\n"
+        "        return decode_short(values)\n"
+        f"    return record({', '.join(values)})\n"
+    )
+
+    def decode_short(values):
+        return namespace["record"](*(
+            CONVERTERS[type_name](value) if CONVERTERS[type_name] else value
+            for (_, type_name), value in zip(columns, values)
+        ))
+
+    namespace["decode_short"] = decode_short
+    exec(source, namespace)
+    return namespace["decode"]
+
+
+def _section_lines(file):
+    """
+    Yield the content lines of the current section, stopping after its closing brace.
+    """
+    for line in file:
+        line = line.strip()
+        if line == "}":
+            return
+        if line and not line.startswith("//"):
+            yield line
+
+
+def _scan_sections(file, sections=None):
+    """
+    Yield (section_name, line_iterator) for each section in an open DB file.
+    Each line iterator reads the file lazily and must be used before the next section is requested.
+    Sections not listed in sections are skipped without keeping their lines.
+    """
+    for line in file:
+        line = line.strip()
+        if not line or line.startswith("//"):
+            continue
+
+        # Detect section headers
+        match = SECTION_HEADER.match(line)
+        if not match:
+            continue
+        section = match.group(1)
+        lines = _section_lines(file)
+        if sections is None or section in sections:
+            yield section, lines
+        # Skip whatever the caller did not read
+        for _ in lines:
+            pass
+
+
+def _decode_section(section, lines):
+    """
+    Read a section's header row and yield its remaining rows as typed records.
+    """
+    header = next(lines, None)
+    if header is None:
+        return
+    decode = compile_row_decoder(section, parse_header(header))
+    for line in lines:
+        try:
+            yield decode(line.split(", "))
+        except ValueError as error:
+            raise ValueError(f"Invalid row in section {section}: {line!r} ({error})") from error
+
+
+def iter_sections(file_path, sections=None):
+    """
+    Stream the records of an AirlineResDB.txt file as it is read.
+
+    Args:
+    - file_path: Path to the AirlineResDB.txt file.
+    - sections: Optional collection of section names to read. Other sections are skipped
+      without being materialized.
+
+    Yields:
+    - (section_name, record) tuples in file order.
+    """
+    with open(file_path, 'r') as file:
+        for section, lines in _scan_sections(file, sections):
+            for record in _decode_section(section, lines):
+                yield section, record
+
 
 def parse_airline_res_db(file_path):
     """
     Parse the AirlineResDB.txt file into structured data.
+    Field names and types come from each section's header row (see parse_header).
 
     Args:
     - file_path: Path to the AirlineResDB.txt file.
 
     Returns:
-    - A dictionary containing parsed data.
+    - A dictionary mapping section names to lists of records (see records.py).
     """
     data = {}
-    current_section = None
-
     with open(file_path, 'r') as file:
-        for line in file:
-            line = line.strip()
-            if not line or line.startswith("//"):
-                continue
-
-            # Detect section headers
-            match = re.match(r"(\w+)\s*=\s*{", line)
-            if match:
-                current_section = match.group(1)
-                data[current_section] = []
-                continue
-
-            # Detect section end
-            if line == "}":
-                current_section = None
-                continue
-
-            # Parse section content
-            if current_section:
-                data[current_section].append(line)
-
-    # Convert lists of strings into structured dictionaries
-    for section, lines in data.items():
-        if section == "Airport":
-            data[section] = [
-                dict(zip(["Airport_code", "Name", "City", "State"], line.split(", ")))
-                for line in lines
-            ]
-        elif section == "Flight":
-            data[section] = [
-                dict(zip(["Flight_number", "Airline", "Weekdays"], line.split(", ")))
-                for line in lines
-            ]
-        elif section == "Seat_reservation":
-            data[section] = [
-                dict(zip(
-                    ["Flight_number", "Leg_number", "Date", "Seat_number", "Customer_name", "Customer_phone"],
-                    line.split(", ")
-                ))
-                for line in lines
-            ]
-        elif section == "Leg_instance":
-            data[section] = [
-                dict(zip(
-                    ["Flight_number", "Leg_number", "Date", "Number_of_available_seats", "Airplane_id", "Departure_airport_code", "Departure_time", "Arrival_airport_code", "Arrival_time"],
-                    line.split(", ")
-                ))
-                for line in lines
-            ]
-        elif section == "Fare":
-            data[section] = [
-                dict(zip(
-                    ["Flight_number", "Fare_code", "Amount", "Restrictions"],
-                    line.split(", ")
-                ))
-                for line in lines
-            ]
-        elif section == "Airplane_type":
-            data[section] = [
-                dict(zip(
-                    ["Airplane_type_name", "Max_seats", "Company"],
-                    line.split(", ")
-                ))
-                for line in lines
-            ]
-        elif section == "Airplane":
-            data[section] = [
-                dict(zip(
-                    ["Airplane_id", "Total_number_of_seats", "Airplane_type"],
-                    line.split(", ")
-                ))
-                for line in lines
-            ]
-        elif section == "Can_land":
-            data[section] = [
-                dict(zip(
-                    ["Airplane_type_name", "Airport_code"],
-                    line.split(", ")
-                ))
-                for line in lines
-            ]
-        elif section == "Flight_leg":
-            data[section] = [
-                dict(zip(
-                    ["Flight_number", "Leg_number", "Departure_airport_code", "Scheduled_departure_time", "Arrival_airport_code", "Scheduled_arrival_time"],
-                    line.split(", ")
-                ))
-                for line in lines
-            ]
-
-    return data
\ No newline at end of file
+        for section, lines in _scan_sections(file):
+            data[section] = list(_decode_section(section, lines))
+    return data
+
+
+def section_ranges(buffer):
+    """
+    Find the sections of a DB file from its raw bytes.
+
+    Args:
+    - buffer: The file contents (bytes or mmap).
+
+    Returns:
+    - A dictionary mapping section names to the (start, end) byte range of their rows, header row
+      included and closing brace excluded.
+    """
+    ranges = {}
+    position = 0
+    while True:
+        header = SECTION_HEADER_LINE.search(buffer, position)
+        if header is None:
+            return ranges
+        end = SECTION_END_LINE.search(buffer, header.end())
+        ranges[header.group(1).decode("utf-8")] = (header.end(), end.start() if end else len(buffer))
+        position = end.end() if end else len(buffer)
+
+
+class LazyAirlineResDB(Mapping):
+    def __init__(self, file_path):
+        """
+        Read-only mapping of section names to records that parses each section on first access.
+        Opening only scans the file for the byte ranges of its sections.
+        Args:
+        - file_path: Path to the AirlineResDB.txt file.
+        """
+        self.file_path = file_path
+        self.offsets = {}  # section -> (start, end) byte range of its rows, header row included
+        self.sections = {}  # section -> parsed records, filled on first access
+        if os.path.getsize(file_path) == 0:
+            return
+        with open(file_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            self.offsets = section_ranges(buffer)
+
+    def __getitem__(self, section):
+        records = self.sections.get(section)
+        if records is None:
+            start, end = self.offsets[section]
+            with open(self.file_path, "rb") as file:
+                file.seek(start)
+                text = file.read(end - start).decode("utf-8")
+            records = self.sections[section] = list(_decode_section(section, _section_lines(text.splitlines())))
+        return records
+
+    def __iter__(self):
+        return iter(self.offsets)
+
+    def __len__(self):
+        return len(self.offsets)
+
+
+def _parse_shard(file_path):
+    """
+    Parse one DB file in a worker process and return it as columns.
+    Each section is sent back as (field names, row count, columns), with equal values in a column
+    sharing one object, so pickle writes each distinct value once instead of a record per row.
+    """
+    shard = {}
+    for section, records in parse_airline_res_db(file_path).items():
+        fields = records[0]._fields if records else ()
+        columns = []
+        for column in zip(*records):
+            distinct = {}
+            columns.append([distinct.setdefault(value, value) for value in column])
+        shard[section] = (fields, len(records), columns)
+    return shard
+
+
+def _records_from_columns(record, row_count, columns):
+    """
+    Build row_count records of a record type from columns of field values.
+    """
+    if not columns:
+        return [record() for _ in range(row_count)]
+    # tuple.__new__ builds the records without going through the namedtuple constructor.
+    # Records only hold strings, numbers and dates, so the cycle collector has nothing to find
+    # in them and is paused instead of running over and over while they are allocated.
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        return list(map(partial(tuple.__new__, record), zip(*columns)))
+    finally:
+        if collecting:
+            gc.enable()
+
+
+def parse_airline_res_dbs(pattern, max_workers=None, min_parallel_bytes=PARALLEL_PARSE_MIN_BYTES):
+    """
+    Parse every DB file matching a glob pattern in a process pool and merge the results.
+
+    Args:
+    - pattern: Glob pattern of AirlineResDB.txt-format files (e.g., "data/AirlineResDB-*.txt").
+    - max_workers: Number of worker processes. Defaults to one per CPU; 1 parses in this process.
+    - min_parallel_bytes: Files smaller than this in total are parsed in this process.
+
+    Returns:
+    - A dictionary mapping section names to lists of records, as parse_airline_res_db returns.
+      Files are merged in sorted path order, so the result does not depend on scheduling.
+
+    Raises:
+    - ValueError: If no file matches, or if two files contain a row with the same key (see SECTION_KEYS).
+    """
+    file_paths = sorted(glob.glob(pattern))
+    if not file_paths:
+        raise ValueError(f"No DB files match {pattern!r}.")
+    max_workers = min(max_workers or os.cpu_count() or 1, len(file_paths))
+
+    if max_workers == 1 or sum(map(os.path.getsize, file_paths)) < min_parallel_bytes:
+        shards = (parse_airline_res_db(file_path) for file_path in file_paths)
+        return _merge_shards(zip(file_paths, shards))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        shards = (
+            {
+                section: _records_from_columns(record_type(section, fields), row_count, columns)
+                for section, (fields, row_count, columns) in shard.items()
+            }
+            for shard in executor.map(_parse_shard, file_paths)
+        )
+        return _merge_shards(zip(file_paths, shards))
+
+
+def _merge_shards(shards):
+    """
+    Concatenate parsed shards section by section, rejecting rows whose key was already
+    seen in an earlier file. Duplicates within one file are kept, as parse_airline_res_db does.
+    """
+    data = {}
+    seen = {}  # section -> {key: file_path}
+    for file_path, shard in shards:
+        for section, rows in shard.items():
+            key_fields = SECTION_KEYS.get(section, ())
+            if rows and key_fields and set(key_fields) <= set(rows[0]._fields):
+                section_seen = seen.setdefault(section, {})
+                keys = dict.fromkeys(map(attrgetter(*key_fields), rows), file_path)
+                if not section_seen.keys().isdisjoint(keys):
+                    key = next(key for key in keys if key in section_seen)
+                    raise ValueError(
+                        f"Duplicate {section} row {key!r} in {file_path} (already in {section_seen[key]})."
+                    )
+                section_seen.update(keys)
+            data.setdefault(section, []).extend(rows)
+    return data